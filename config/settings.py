@@ -91,6 +91,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/#redis
+
+# Общий для всех воркеров: снимки табло мониторинга, дневные итоги
+# аналитики и версии справочников сбрасываются сразу во всех процессах
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL') or 'redis://localhost:6379/0',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -1,9 +1,17 @@
+import multiprocessing
 import os
 
 bind = '0.0.0.0:8000'
 
-workers = int(os.getenv('GUNICORN_WORKERS', '2'))
-threads = int(os.getenv('GUNICORN_THREADS', '2'))
+# ASGI-воркеры: push-канал мониторинга (SSE) держит соединение с каждым
+# табло открытым, и под синхронными (gthread) воркерами каждое табло
+# занимало бы поток навсегда. Настройка threads к ASGI-воркерам
+# не применяется: Django выполняет синхронные view через sync_to_async,
+# каждый запрос в своём потоке, но под GIL одного процесса. Поэтому
+# пропускная способность обычных страниц задаётся числом процессов —
+# по рекомендации gunicorn, 2 × CPU + 1.
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
 
 timeout = 120
 
@@ -1,3 +1,4 @@
+from .alert import AlertAdmin, AlertRuleAdmin
 from .deviation import DeviationGroupAdmin, DeviationReasonAdmin
 from .deviation_entry import DeviationEntryAdmin
 from .employee import EmployeeAdmin
@@ -7,6 +8,7 @@ from .pa_template import PATemplateAdmin
 from .product import ProductAdmin
 from .sector import SectorAdmin
 from .shift import ShiftAdmin
+from .sync_operation import SyncOperationAdmin
 from .taken_measure import TakenMeasureAdmin
 from .workplace import WorkplaceAdmin
 from .workshop import WorkshopAdmin
@@ -28,4 +30,9 @@ __all__ = [
     # Отклонения и меры
     'DeviationEntryAdmin',
     'TakenMeasureAdmin',
+    # Оповещения
+    'AlertRuleAdmin',
+    'AlertAdmin',
+    # Синхронизация
+    'SyncOperationAdmin',
 ]
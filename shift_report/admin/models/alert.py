@@ -0,0 +1,60 @@
+from django.contrib import admin
+
+from shift_report.models import Alert, AlertRule
+
+
+@admin.register(AlertRule)
+class AlertRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'metric', 'threshold', 'sector', 'workplace', 'is_active')
+    list_filter = ('is_active', 'metric', 'sector')
+    search_fields = ('name', 'sector__name', 'workplace__name')
+    ordering = ('metric', 'threshold')
+    autocomplete_fields = ['sector', 'workplace']
+
+    fieldsets = (
+        (None, {
+            'fields': ('name', 'metric', 'threshold', 'is_active')
+        }),
+        ('Область действия', {
+            'fields': ('sector', 'workplace'),
+            'description': 'Без участка и рабочего места правило действует для всех РМ',
+        }),
+    )
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'blank',
+        'rule',
+        'metric',
+        'value',
+        'threshold',
+        'created_at',
+        'acknowledged_at',
+        'acknowledged_by',
+    )
+    list_filter = (
+        'metric',
+        'created_at',
+        'acknowledged_at',
+    )
+    search_fields = (
+        'rule__name',
+        'blank__workplace__name',
+    )
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'rule',
+        'blank',
+        'record',
+        'metric',
+        'value',
+        'threshold',
+        'dedupe_key',
+        'created_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
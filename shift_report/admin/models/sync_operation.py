@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from shift_report.models import SyncOperation
+
+
+@admin.register(SyncOperation)
+class SyncOperationAdmin(admin.ModelAdmin):
+    list_display = (
+        'idempotency_key',
+        'record',
+        'employee',
+        'client_created_at',
+        'applied_at',
+    )
+    list_filter = (
+        'applied_at',
+    )
+    search_fields = (
+        'idempotency_key',
+        'record__blank__workplace__name',
+    )
+    ordering = ('-applied_at',)
+    readonly_fields = (
+        'idempotency_key',
+        'record',
+        'employee',
+        'client_created_at',
+        'applied_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
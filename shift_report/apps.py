@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ShiftReportConfig(AppConfig):
     name = 'shift_report'
+
+    def ready(self):
+        from shift_report import signals  # noqa: F401
@@ -276,8 +276,16 @@ class TemplateCreateForm(forms.ModelForm):
 class BlankEditForm(forms.ModelForm):
     """
     Форма редактирования бланка.
+
+    Поле version хранит версию бланка на момент открытия формы
+    и используется для обнаружения параллельных изменений.
     """
 
+    version = forms.IntegerField(
+        widget=forms.HiddenInput(),
+        required=False,
+    )
+
     class Meta:
         model = PABlank
         fields = ['planned_quantity', 'status', 'notes']
@@ -293,3 +301,8 @@ class BlankEditForm(forms.ModelForm):
                 'rows': 3,
             }),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and not self.is_bound:
+            self.initial['version'] = self.instance.version
@@ -0,0 +1,78 @@
+"""
+Команда для автоматического закрытия завершившихся смен.
+
+Использование:
+    python manage.py close_shifts
+    python manage.py close_shifts --grace-minutes 60
+    python manage.py close_shifts --loop --interval 300
+
+Бланки, смена которых закончилась больше чем grace-minutes назад,
+пересчитываются и переводятся в статус «Завершён». Заодно повторяется
+пересчёт итогов аналитики, который не удался после сохранения бланка.
+С флагом --loop команда работает постоянно и повторяет проверку каждые
+interval секунд.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shift_report.services.rollups import RollupService
+from shift_report.services.shift_close import ShiftCloseService
+
+
+class Command(BaseCommand):
+    help = 'Закрывает бланки ПА завершившихся смен'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=30,
+            help='Льготный период после окончания смены, мин (по умолчанию 30)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Повторять проверку с интервалом --interval',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=300,
+            help='Интервал между проверками, сек (по умолчанию 300)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать количество бланков к закрытию',
+        )
+
+    def handle(self, *args, **options):
+        service = ShiftCloseService(grace_minutes=options['grace_minutes'])
+
+        if options['dry_run']:
+            count = service.get_due_blanks().count()
+            self.stdout.write(f'Бланков к закрытию: {count}')
+            return
+
+        while True:
+            closed = service.close_due_blanks()
+            if closed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Закрыто бланков: {closed}'
+                ))
+
+            refreshed = RollupService().refresh_dirty()
+            if refreshed:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Пересчитано итогов: {refreshed}'
+                ))
+
+            if not options['loop']:
+                break
+
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,57 @@
+"""
+Команда для перестройки дневных итоговых таблиц аналитики.
+
+Использование:
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --days 90
+    python manage.py rebuild_rollups --date-from 2025-01-01 --date-to 2025-03-31
+
+Итоги поддерживаются автоматически при изменении бланков; перестройка
+нужна после развёртывания, загрузки данных в обход приложения или
+переноса рабочих мест между участками.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from shift_report.services.rollups import RollupService
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает дневные итоги выпуска и отклонений для аналитики'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date-from',
+            help='Начало периода (ГГГГ-ММ-ДД)',
+        )
+        parser.add_argument(
+            '--date-to',
+            help='Конец периода (ГГГГ-ММ-ДД)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Перестроить последние N дней (вместо --date-from)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_from = self._parse_date(options['date_from'])
+            date_to = self._parse_date(options['date_to'])
+        except ValueError as e:
+            raise CommandError(f'Некорректная дата: {e}')
+
+        if options['days']:
+            date_from = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        created = RollupService().rebuild(date_from, date_to)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Перестроено итогов бланков: {created}'
+        ))
+
+    def _parse_date(self, value):
+        return date.fromisoformat(value) if value else None
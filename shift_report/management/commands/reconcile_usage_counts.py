@@ -0,0 +1,44 @@
+"""
+Команда для пересчёта счётчиков использования причин отклонений.
+
+Использование:
+    python manage.py reconcile_usage_counts
+
+Счётчики поддерживаются инкрементально при создании и удалении записей
+об отклонениях. Команда восстанавливает их по фактическим данным
+(например, после каскадного удаления бланков или ручной правки в админке).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from shift_report.models import DeviationEntry, DeviationReason
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики использования причин отклонений'
+
+    def handle(self, *args, **options):
+        # Один GROUP BY по всем записям об отклонениях
+        counts = dict(
+            DeviationEntry.objects.order_by().values('reason').annotate(
+                entries=Count('id')
+            ).values_list('reason', 'entries')
+        )
+
+        changed = []
+        for reason in DeviationReason.objects.only('pk', 'usage_count'):
+            usage_count = counts.get(reason.pk, 0)
+            if reason.usage_count != usage_count:
+                reason.usage_count = usage_count
+                changed.append(reason)
+
+        with transaction.atomic():
+            DeviationReason.objects.bulk_update(
+                changed, ['usage_count'], batch_size=500
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Счётчики пересчитаны, изменено причин: {len(changed)}'
+        ))
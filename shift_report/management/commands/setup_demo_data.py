@@ -22,7 +22,7 @@ from shift_report.models import (DeviationEntry, DeviationGroup,
                                  DeviationReason, Employee, PABlank, PARecord,
                                  Product, Sector, Shift, TakenMeasure,
                                  Workplace, Workshop)
-from shift_report.services import BlankGeneratorService
+from shift_report.services import BlankGeneratorService, RollupService
 
 
 class Command(BaseCommand):
@@ -66,6 +66,10 @@ class Command(BaseCommand):
         self.stdout.write('  5. Заполнение данных и отклонений...')
         self._fill_records(blanks, reasons, users)
 
+        # 6. Итоги для аналитики (данные заполнены в обход RecordInputService)
+        self.stdout.write('  6. Итоги для аналитики...')
+        RollupService().rebuild()
+
         self.stdout.write(self.style.SUCCESS('\n✓ Демо-данные успешно созданы!'))
         self._print_summary(workshops, sectors, workplaces, users, blanks)
 
@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-17 01:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(help_text='Генерируется устройством оператора', max_length=64, unique=True, verbose_name='Ключ идемпотентности')),
+                ('client_created_at', models.DateTimeField(blank=True, null=True, verbose_name='Создано на устройстве')),
+                ('applied_at', models.DateTimeField(auto_now_add=True, verbose_name='Применено')),
+                ('employee', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_operations', to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_operations', to='shift_report.parecord', verbose_name='Запись ПА')),
+            ],
+            options={
+                'verbose_name': 'Операция синхронизации',
+                'verbose_name_plural': 'Операции синхронизации',
+                'ordering': ['-applied_at'],
+                'indexes': [models.Index(fields=['applied_at'], name='shift_repor_applied_525a49_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-17 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0002_sync_operation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pablank',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Увеличивается при каждом изменении итогов или параметров бланка', verbose_name='Версия'),
+        ),
+    ]
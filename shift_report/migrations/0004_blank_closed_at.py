@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0003_blank_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pablank',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Заполняется при автоматическом закрытии смены; итоги после закрытия не меняются', null=True, verbose_name='Дата закрытия'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-17 02:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0004_blank_closed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('metric', models.CharField(choices=[('hourly_deviation', 'Отклонение за час, шт'), ('cumulative_deviation', 'Накопительное отклонение, шт'), ('downtime', 'Простой за час, мин')], max_length=30, verbose_name='Показатель')),
+                ('threshold', models.PositiveIntegerField(help_text='Недовыпуск, шт (для отклонений) или простой, мин', verbose_name='Порог')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активно')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('sector', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to='shift_report.sector', verbose_name='Участок')),
+                ('workplace', models.ForeignKey(blank=True, help_text='Если указано, правило действует только для этого РМ', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to='shift_report.workplace', verbose_name='Рабочее место')),
+            ],
+            options={
+                'verbose_name': 'Правило оповещения',
+                'verbose_name_plural': 'Правила оповещений',
+                'ordering': ['metric', 'threshold'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('hourly_deviation', 'Отклонение за час, шт'), ('cumulative_deviation', 'Накопительное отклонение, шт'), ('downtime', 'Простой за час, мин')], max_length=30, verbose_name='Показатель')),
+                ('value', models.IntegerField(verbose_name='Значение')),
+                ('threshold', models.PositiveIntegerField(verbose_name='Порог')),
+                ('dedupe_key', models.CharField(max_length=64, unique=True, verbose_name='Ключ дедупликации')),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True, verbose_name='Просмотрено')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('acknowledged_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='acknowledged_alerts', to=settings.AUTH_USER_MODEL, verbose_name='Просмотрел')),
+                ('blank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='shift_report.pablank', verbose_name='Бланк ПА')),
+                ('record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='shift_report.parecord', verbose_name='Запись ПА')),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='shift_report.alertrule', verbose_name='Правило')),
+            ],
+            options={
+                'verbose_name': 'Оповещение',
+                'verbose_name_plural': 'Оповещения',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['acknowledged_at', 'created_at'], name='shift_repor_acknowl_ada8fb_idx')],
+            },
+        ),
+    ]
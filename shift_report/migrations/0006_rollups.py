@@ -0,0 +1,59 @@
+# Generated by Django 6.1.2 on 2026-10-17 02:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0005_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('entries_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('duration_minutes', models.PositiveIntegerField(default=0, verbose_name='Длительность, мин')),
+                ('reason', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.deviationreason', verbose_name='Причина отклонения')),
+                ('sector', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.sector', verbose_name='Участок')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.shift', verbose_name='Смена')),
+                ('workplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.workplace', verbose_name='Рабочее место')),
+                ('workshop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.workshop', verbose_name='Цех')),
+            ],
+            options={
+                'verbose_name': 'Итог отклонений за день',
+                'verbose_name_plural': 'Итоги отклонений за день',
+                'ordering': ['-date', 'shift', 'workplace', 'reason'],
+                'indexes': [models.Index(fields=['sector', 'date'], name='shift_repor_sector__fddfba_idx'), models.Index(fields=['workshop', 'date'], name='shift_repor_worksho_fc4872_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'shift', 'workplace', 'reason'), name='unique_deviation_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('status', models.CharField(max_length=20, verbose_name='Статус бланка')),
+                ('total_plan', models.PositiveIntegerField(default=0, verbose_name='План, шт')),
+                ('total_fact', models.PositiveIntegerField(default=0, verbose_name='Факт, шт')),
+                ('total_deviation', models.IntegerField(default=0, verbose_name='Отклонение, шт')),
+                ('total_downtime', models.PositiveIntegerField(default=0, verbose_name='Простой, мин')),
+                ('deviations_count', models.PositiveIntegerField(default=0, verbose_name='Записей об отклонениях')),
+                ('sector', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.sector', verbose_name='Участок')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.shift', verbose_name='Смена')),
+                ('workplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.workplace', verbose_name='Рабочее место')),
+                ('workshop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.workshop', verbose_name='Цех')),
+            ],
+            options={
+                'verbose_name': 'Итог выпуска за день',
+                'verbose_name_plural': 'Итоги выпуска за день',
+                'ordering': ['-date', 'shift', 'workplace'],
+                'indexes': [models.Index(fields=['sector', 'date'], name='shift_repor_sector__1d434c_idx'), models.Index(fields=['workshop', 'date'], name='shift_repor_worksho_8a0071_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'shift', 'workplace'), name='unique_production_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-17 02:38
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0006_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alertrule',
+            name='threshold',
+            field=models.PositiveIntegerField(help_text='Недовыпуск, шт (для отклонений) или простой, мин', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Порог'),
+        ),
+    ]
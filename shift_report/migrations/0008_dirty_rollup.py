@@ -0,0 +1,30 @@
+# Generated by Django 6.1.2 on 2026-10-17 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shift_report', '0007_alert_rule_threshold_min'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Отмечен')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.shift', verbose_name='Смена')),
+                ('workplace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='shift_report.workplace', verbose_name='Рабочее место')),
+            ],
+            options={
+                'verbose_name': 'Итог к пересчёту',
+                'verbose_name_plural': 'Итоги к пересчёту',
+                'ordering': ['created_at'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'shift', 'workplace'), name='unique_dirty_rollup')],
+            },
+        ),
+    ]
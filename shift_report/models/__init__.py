@@ -1,12 +1,15 @@
+from .alert import Alert, AlertMetric, AlertRule
 from .deviation import DeviationGroup, DeviationReason
 from .deviation_entry import DeviationEntry
 from .employee import Employee, EmployeeRole
-from .pa_blank import PABlank, PABlankStatus, PABlankType
+from .pa_blank import BlankVersionConflict, PABlank, PABlankStatus, PABlankType
 from .pa_record import PARecord
 from .pa_template import PATemplate
 from .product import Product
+from .rollup import DeviationRollup, DirtyRollup, ProductionRollup
 from .sector import Sector
 from .shift import Shift
+from .sync_operation import SyncOperation
 from .taken_measure import MeasureType, TakenMeasure
 from .workplace import Workplace
 from .workshop import Workshop
@@ -26,10 +29,21 @@ __all__ = [
     'PABlank',
     'PABlankType',
     'PABlankStatus',
+    'BlankVersionConflict',
     'PARecord',
     'PATemplate',
     # Отклонения и меры
     'DeviationEntry',
     'TakenMeasure',
     'MeasureType',
+    # Оповещения
+    'AlertRule',
+    'AlertMetric',
+    'Alert',
+    # Аналитика
+    'ProductionRollup',
+    'DeviationRollup',
+    'DirtyRollup',
+    # Синхронизация
+    'SyncOperation',
 ]
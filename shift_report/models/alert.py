@@ -0,0 +1,171 @@
+from django.core.validators import MinValueValidator
+from django.db.models import (CASCADE, SET_NULL, BooleanField, CharField,
+                              DateTimeField, ForeignKey, Index, IntegerField,
+                              Model, PositiveIntegerField, TextChoices)
+
+
+class AlertMetric(TextChoices):
+    """Показатели, по которым срабатывают оповещения"""
+    HOURLY_DEVIATION = 'hourly_deviation', 'Отклонение за час, шт'
+    CUMULATIVE_DEVIATION = 'cumulative_deviation', 'Накопительное отклонение, шт'
+    DOWNTIME = 'downtime', 'Простой за час, мин'
+
+
+class AlertRule(Model):
+    """
+    Правило оповещения мастера
+
+    Порог по показателю записи ПА. Для отклонений правило срабатывает,
+    когда недовыпуск достигает порога (отклонение <= -порог), для простоя —
+    когда суммарная длительность причин за час достигает порога.
+
+    Область действия: рабочее место, участок или всё предприятие
+    (если не указаны ни участок, ни рабочее место).
+    """
+
+    class Meta:
+        verbose_name = 'Правило оповещения'
+        verbose_name_plural = 'Правила оповещений'
+        ordering = ['metric', 'threshold']
+
+    name = CharField(
+        'Название',
+        max_length=255,
+    )
+
+    metric = CharField(
+        'Показатель',
+        max_length=30,
+        choices=AlertMetric.choices,
+    )
+
+    threshold = PositiveIntegerField(
+        'Порог',
+        validators=[MinValueValidator(1)],
+        help_text='Недовыпуск, шт (для отклонений) или простой, мин',
+    )
+
+    sector = ForeignKey(
+        'shift_report.Sector',
+        verbose_name='Участок',
+        related_name='alert_rules',
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+    )
+
+    workplace = ForeignKey(
+        'shift_report.Workplace',
+        verbose_name='Рабочее место',
+        related_name='alert_rules',
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+        help_text='Если указано, правило действует только для этого РМ',
+    )
+
+    is_active = BooleanField(
+        'Активно',
+        default=True,
+    )
+
+    created_at = DateTimeField(
+        'Дата создания',
+        auto_now_add=True,
+    )
+
+    updated_at = DateTimeField(
+        'Дата обновления',
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_metric_display()} ≥ {self.threshold})'
+
+
+class Alert(Model):
+    """
+    Оповещение мастера
+
+    Создаётся при срабатывании правила в момент сохранения данных
+    оператором. Ключ дедупликации не даёт повторить оповещение по тому же
+    правилу для того же часа (а для накопительного отклонения — для того
+    же бланка).
+    """
+
+    class Meta:
+        verbose_name = 'Оповещение'
+        verbose_name_plural = 'Оповещения'
+        ordering = ['-created_at']
+        indexes = [
+            Index(fields=['acknowledged_at', 'created_at']),
+        ]
+
+    rule = ForeignKey(
+        'shift_report.AlertRule',
+        verbose_name='Правило',
+        related_name='alerts',
+        on_delete=CASCADE,
+    )
+
+    blank = ForeignKey(
+        'shift_report.PABlank',
+        verbose_name='Бланк ПА',
+        related_name='alerts',
+        on_delete=CASCADE,
+    )
+
+    record = ForeignKey(
+        'shift_report.PARecord',
+        verbose_name='Запись ПА',
+        related_name='alerts',
+        on_delete=CASCADE,
+    )
+
+    metric = CharField(
+        'Показатель',
+        max_length=30,
+        choices=AlertMetric.choices,
+    )
+
+    value = IntegerField(
+        'Значение',
+    )
+
+    threshold = PositiveIntegerField(
+        'Порог',
+    )
+
+    dedupe_key = CharField(
+        'Ключ дедупликации',
+        max_length=64,
+        unique=True,
+    )
+
+    acknowledged_at = DateTimeField(
+        'Просмотрено',
+        null=True,
+        blank=True,
+    )
+
+    acknowledged_by = ForeignKey(
+        'shift_report.Employee',
+        verbose_name='Просмотрел',
+        related_name='acknowledged_alerts',
+        on_delete=SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    created_at = DateTimeField(
+        'Дата создания',
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f'{self.blank} | {self.get_metric_display()}: {self.value}'
+
+    @property
+    def is_acknowledged(self):
+        """Оповещение просмотрено?"""
+        return self.acknowledged_at is not None
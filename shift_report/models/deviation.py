@@ -1,5 +1,7 @@
-from django.db.models import (CASCADE, BooleanField, CharField, ForeignKey,
-                              Model, PositiveIntegerField, TextField)
+from django.db.models import (CASCADE, BooleanField, Case, CharField, F,
+                              ForeignKey, Model, PositiveIntegerField,
+                              TextField, Value, When)
+from django.db.models.functions import Greatest
 
 
 class DeviationGroup(Model):
@@ -108,7 +110,7 @@ class DeviationReason(Model):
         default=True,
     )
 
-    # Статистика использования (обновляется периодически)
+    # Статистика использования (обновляется при создании/удалении записей)
     usage_count = PositiveIntegerField(
         'Количество использований',
         default=0,
@@ -118,3 +120,28 @@ class DeviationReason(Model):
 
     def __str__(self):
         return f'{self.group.name}: {self.name}'
+
+    @classmethod
+    def adjust_usage_counts(cls, deltas: dict[int, int]) -> None:
+        """
+        Атомарная корректировка счётчиков использования.
+
+        Применяет изменения сразу ко всем причинам одним UPDATE
+        без подсчёта записей об отклонениях.
+
+        Args:
+            deltas: Изменение счётчика по id причины
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        cls.objects.filter(pk__in=deltas).update(
+            usage_count=Greatest(
+                F('usage_count') + Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                    default=Value(0),
+                ),
+                Value(0),
+            )
+        )
@@ -1,5 +1,37 @@
-from django.db.models import (CASCADE, SET_NULL, DateTimeField, ForeignKey,
-                              Index, Model, PositiveIntegerField, TextField)
+from django.db.models import (CASCADE, SET_NULL, Count, DateTimeField,
+                              ForeignKey, Index, Model, PositiveIntegerField,
+                              QuerySet, TextField)
+
+from .deviation import DeviationReason
+
+
+class DeviationEntryQuerySet(QuerySet):
+    """QuerySet записей об отклонениях с поддержкой счётчиков причин"""
+
+    def delete(self, adjust_usage=True):
+        """
+        Массовое удаление с уменьшением счётчиков использования причин.
+
+        Args:
+            adjust_usage: Корректировать ли счётчики (False, если вызывающий
+                код применяет изменения счётчиков сам, одним запросом)
+        """
+        if not adjust_usage:
+            return super().delete()
+
+        usage = dict(
+            self.order_by().values('reason').annotate(
+                entries=Count('id')
+            ).values_list('reason', 'entries')
+        )
+
+        result = super().delete()
+
+        DeviationReason.adjust_usage_counts({
+            reason_id: -entries for reason_id, entries in usage.items()
+        })
+
+        return result
 
 
 class DeviationEntry(Model):
@@ -23,6 +55,9 @@ class DeviationEntry(Model):
             Index(fields=['created_at']),
         ]
 
+    # Длительность по одной причине не больше часа записи
+    MAX_DURATION_MINUTES = 60
+
     record = ForeignKey(
         'shift_report.PARecord',
         verbose_name='Запись ПА',
@@ -76,16 +111,20 @@ class DeviationEntry(Model):
         auto_now_add=True,
     )
 
+    objects = DeviationEntryQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.record} | {self.reason.name} ({self.duration_minutes} мин)'
 
     def save(self, *args, **kwargs):
+        is_new = self._state.adding
         super().save(*args, **kwargs)
         # Обновляем счётчик использования причины (для топ-5)
-        self._update_reason_usage_count()
+        if is_new:
+            DeviationReason.adjust_usage_counts({self.reason_id: 1})
 
-    def _update_reason_usage_count(self):
-        """Обновление статистики использования причины"""
-        count = DeviationEntry.objects.filter(reason=self.reason).count()
-        self.reason.usage_count = count
-        self.reason.save(update_fields=['usage_count'])
+    def delete(self, *args, **kwargs):
+        reason_id = self.reason_id
+        result = super().delete(*args, **kwargs)
+        DeviationReason.adjust_usage_counts({reason_id: -1})
+        return result
@@ -2,10 +2,14 @@ import math
 from decimal import Decimal
 
 from django.core.validators import MinValueValidator
-from django.db.models import (CASCADE, SET_NULL, CharField, DateField,
-                              DateTimeField, DecimalField, ForeignKey, Index,
-                              IntegerField, Model, PositiveIntegerField, Sum,
-                              TextChoices, TextField, UniqueConstraint)
+from django.db import connection
+from django.db.models import (CASCADE, SET_NULL, Case, CharField, DateField,
+                              DateTimeField, DecimalField, F, ForeignKey,
+                              Index, IntegerField, Model, PositiveIntegerField,
+                              Q, QuerySet, Sum, TextChoices, TextField,
+                              UniqueConstraint, Value, When)
+from django.db.models.functions import Cast
+from django.db.transaction import TransactionManagementError
 
 
 class PABlankType(TextChoices):
@@ -25,6 +29,34 @@ class PABlankStatus(TextChoices):
     CANCELLED = 'cancelled', 'Отменён'
 
 
+class BlankVersionConflict(Exception):
+    """Бланк был параллельно изменён другим пользователем"""
+
+
+class PABlankQuerySet(QuerySet):
+    """QuerySet бланков ПА"""
+
+    def with_progress(self, now=None):
+        """
+        Аннотация плана и факта за уже завершившиеся часы.
+
+        Заменяет отдельный SUM по записям для каждого бланка
+        (current_completion_percentage, status_color) одним запросом
+        на весь список.
+
+        Args:
+            now: Момент расчёта (по умолчанию — текущее время)
+        """
+        from django.utils import timezone
+
+        completed = Q(records__end_time__lte=timezone.localtime(now).time())
+
+        return self.annotate(
+            elapsed_plan=Sum('records__planned_quantity', filter=completed),
+            elapsed_fact=Sum('records__actual_quantity', filter=completed),
+        )
+
+
 class PABlank(Model):
     """
     Бланк производственного анализа
@@ -176,6 +208,21 @@ class PABlank(Model):
     )
 
     # Служебные поля
+    version = PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False,
+        help_text='Увеличивается при каждом изменении итогов или параметров бланка',
+    )
+
+    closed_at = DateTimeField(
+        'Дата закрытия',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Заполняется при автоматическом закрытии смены; итоги после закрытия не меняются',
+    )
+
     created_by = ForeignKey(
         'shift_report.Employee',
         verbose_name='Создал',
@@ -194,6 +241,8 @@ class PABlank(Model):
         auto_now=True,
     )
 
+    objects = PABlankQuerySet.as_manager()
+
     def __str__(self):
         return f'ПА {self.workplace} | {self.date} | {self.shift}'
 
@@ -228,31 +277,132 @@ class PABlank(Model):
                 self.workplace.achieved_capacity
             )
 
-    def recalculate_totals(self):
-        """Пересчёт итоговых показателей на основе записей"""
-        aggregates = self.records.aggregate(
-            sum_plan=Sum('planned_quantity'),
-            sum_fact=Sum('actual_quantity'),
-            sum_downtime=Sum('downtime_minutes'),
+    def recalculate_totals(self, max_attempts=3):
+        """
+        Пересчёт итоговых показателей на основе записей.
+
+        Запись выполняется с проверкой версии (compare-and-swap): версия
+        читается из БД перед агрегатом (в том числе у экземпляра из only()
+        или defer()), и если бланк успел измениться параллельно, агрегат
+        пересчитывается заново по актуальной версии.
+
+        Raises:
+            BlankVersionConflict: Если за max_attempts попыток
+                не удалось записать итоги
+        """
+        from django.utils import timezone
+
+        for _ in range(max_attempts):
+            self.refresh_from_db(fields=['version'])
+
+            aggregates = self.records.aggregate(
+                sum_plan=Sum('planned_quantity'),
+                sum_fact=Sum('actual_quantity'),
+                sum_downtime=Sum('downtime_minutes'),
+            )
+
+            total_plan = aggregates['sum_plan'] or 0
+            total_fact = aggregates['sum_fact'] or 0
+
+            if total_plan > 0:
+                completion_percentage = (
+                    Decimal(total_fact) / Decimal(total_plan) * 100
+                )
+            else:
+                completion_percentage = Decimal('0.00')
+
+            totals = {
+                'total_plan': total_plan,
+                'total_fact': total_fact,
+                'total_deviation': total_fact - total_plan,
+                'total_downtime': aggregates['sum_downtime'] or 0,
+                'completion_percentage': round(completion_percentage, 2),
+                'updated_at': timezone.now(),
+            }
+
+            updated = PABlank.objects.filter(
+                pk=self.pk,
+                version=self.version,
+            ).update(version=F('version') + 1, **totals)
+
+            if updated:
+                for field, value in totals.items():
+                    setattr(self, field, value)
+                self.version += 1
+                return
+
+        raise BlankVersionConflict(
+            f'Не удалось обновить итоги бланка {self.pk}: параллельные изменения'
         )
 
-        self.total_plan = aggregates['sum_plan'] or 0
-        self.total_fact = aggregates['sum_fact'] or 0
-        self.total_deviation = self.total_fact - self.total_plan
-        self.total_downtime = aggregates['sum_downtime'] or 0
+    def apply_totals_delta(self, plan=0, fact=0, downtime=0):
+        """
+        Инкрементальное обновление итогов бланка.
+
+        Применяет разницу старого и нового значений записи к итогам одним
+        атомарным UPDATE через F()-выражения, без повторной агрегации
+        по записям. Полный пересчёт (recalculate_totals) остаётся
+        как путь восстановления. Версия бланка увеличивается тем же UPDATE.
+
+        Проверки версии здесь нет: вызывать только в транзакции под
+        блокировкой PABlank.lock(), которая и упорядочивает записи.
+
+        Args:
+            plan: Изменение планового количества, шт
+            fact: Изменение фактического количества, шт
+            downtime: Изменение простоя, мин
+
+        Raises:
+            TransactionManagementError: Если вызван вне транзакции
+        """
+        from django.utils import timezone
 
-        if self.total_plan > 0:
-            self.completion_percentage = (
-                Decimal(self.total_fact) / Decimal(self.total_plan) * 100
+        if not connection.in_atomic_block:
+            raise TransactionManagementError(
+                'apply_totals_delta выполняется в транзакции под PABlank.lock()'
             )
-        else:
-            self.completion_percentage = Decimal('0.00')
 
-        self.save(update_fields=[
+        if not (plan or fact or downtime):
+            return
+
+        new_plan = F('total_plan') + plan
+        new_fact = F('total_fact') + fact
+        decimal_field = DecimalField(max_digits=12, decimal_places=4)
+
+        PABlank.objects.filter(pk=self.pk).update(
+            total_plan=new_plan,
+            total_fact=new_fact,
+            total_deviation=F('total_deviation') + (fact - plan),
+            total_downtime=F('total_downtime') + downtime,
+            completion_percentage=Case(
+                When(
+                    total_plan__gt=-plan,
+                    then=Cast(new_fact, decimal_field) * Value(Decimal('100.00')) / Cast(new_plan, decimal_field),
+                ),
+                default=Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=6, decimal_places=2),
+            ),
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+
+        self.refresh_from_db(fields=[
             'total_plan', 'total_fact', 'total_deviation',
-            'total_downtime', 'completion_percentage', 'updated_at'
+            'total_downtime', 'completion_percentage', 'version', 'updated_at'
         ])
 
+    @classmethod
+    def lock(cls, pk):
+        """
+        Блокировка строки бланка до конца текущей транзакции.
+
+        Используется всеми путями записи (ввод оператора, редактирование
+        мастером, пересчёт), чтобы накопительные показатели и итоги
+        одного бланка не перезаписывали друг друга. Блокируется только
+        строка бланка, записи и справочники не затрагиваются.
+        """
+        return cls.objects.select_for_update().get(pk=pk)
+
     @property
     def is_editable(self):
         """Можно ли редактировать бланк"""
@@ -275,13 +425,20 @@ class PABlank(Model):
         if self.date != now.date():
             return self.completion_percentage
 
-        # Находим все записи, которые уже должны были завершиться
-        completed_records = self.records.filter(
-            end_time__lte=current_time
-        ).aggregate(
-            plan=Sum('planned_quantity'),
-            fact=Sum('actual_quantity')
-        )
+        if hasattr(self, 'elapsed_plan'):
+            # Значения уже посчитаны запросом списка (with_progress)
+            completed_records = {
+                'plan': self.elapsed_plan,
+                'fact': self.elapsed_fact,
+            }
+        else:
+            # Находим все записи, которые уже должны были завершиться
+            completed_records = self.records.filter(
+                end_time__lte=current_time
+            ).aggregate(
+                plan=Sum('planned_quantity'),
+                fact=Sum('actual_quantity')
+            )
 
         cumulative_plan = completed_records['plan'] or 0
         cumulative_fact = completed_records['fact'] or 0
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connection
 from django.db.models import (CASCADE, SET_NULL, BooleanField, DateTimeField,
                               ForeignKey, Index, IntegerField, Model,
                               PositiveIntegerField, TimeField,
@@ -139,34 +140,163 @@ class PARecord(Model):
         """
         Пересчёт накопительных показателей.
         Вызывается после обновления записи.
+
+        Пересчитывает весь бланк (в том числе последующие часы)
+        и подтягивает актуальные значения в текущий экземпляр.
+        """
+        PARecord.recalculate_cumulative([self.blank_id])
+        self.refresh_from_db(fields=[
+            'cumulative_plan', 'cumulative_fact', 'cumulative_deviation'
+        ])
+
+    @classmethod
+    def recalculate_cumulative(cls, blank_ids) -> list[dict]:
+        """
+        Set-based пересчёт накопительных показателей бланков.
+
+        Одним UPDATE переписывает cumulative_plan/fact/deviation (и почасовое
+        отклонение) всех записей указанных бланков через оконную сумму
+        по hour_number. Затрагиваются только строки, значения которых
+        действительно изменились; их новые значения возвращаются тем же
+        запросом (RETURNING).
+
+        Args:
+            blank_ids: Идентификаторы бланков
+
+        Returns:
+            list[dict]: Изменённые записи (id, blank_id, hour_number,
+                is_filled, cumulative_plan, cumulative_fact,
+                cumulative_deviation, is_elapsed — час уже завершился
+                по текущему времени)
+        """
+        blank_ids = list(blank_ids)
+        if not blank_ids:
+            return []
+
+        from django.utils import timezone
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(blank_ids))
+
+        sql = f"""
+            UPDATE {table} SET
+                cumulative_plan = running.cum_plan,
+                cumulative_fact = running.cum_fact,
+                cumulative_deviation = running.cum_fact - running.cum_plan,
+                deviation = {table}.actual_quantity - {table}.planned_quantity,
+                updated_at = %s
+            FROM (
+                SELECT
+                    id,
+                    SUM(planned_quantity) OVER hours AS cum_plan,
+                    SUM(actual_quantity) OVER hours AS cum_fact
+                FROM {table}
+                WHERE blank_id IN ({placeholders})
+                WINDOW hours AS (PARTITION BY blank_id ORDER BY hour_number)
+            ) AS running
+            WHERE {table}.id = running.id
+              AND (
+                  {table}.cumulative_plan <> running.cum_plan
+                  OR {table}.cumulative_fact <> running.cum_fact
+                  OR {table}.cumulative_deviation <> running.cum_fact - running.cum_plan
+                  OR {table}.deviation <> {table}.actual_quantity - {table}.planned_quantity
+              )
+            RETURNING
+                {table}.id,
+                {table}.blank_id,
+                {table}.hour_number,
+                {table}.is_filled,
+                {table}.cumulative_plan,
+                {table}.cumulative_fact,
+                {table}.cumulative_deviation,
+                {table}.end_time <= %s
         """
-        # Получаем все записи до текущей включительно
-        previous_records = self.blank.records.filter(
-            hour_number__lte=self.hour_number
-        ).order_by('hour_number')
-
-        cumulative_plan = 0
-        cumulative_fact = 0
-
-        for record in previous_records:
-            cumulative_plan += record.planned_quantity
-            cumulative_fact += record.actual_quantity
-
-            if record.pk == self.pk:
-                self.cumulative_plan = cumulative_plan
-                self.cumulative_fact = cumulative_fact
-                self.cumulative_deviation = cumulative_fact - cumulative_plan
-            else:
-                # Обновляем предыдущие записи если нужно
-                if (record.cumulative_plan != cumulative_plan or
-                        record.cumulative_fact != cumulative_fact):
-                    record.cumulative_plan = cumulative_plan
-                    record.cumulative_fact = cumulative_fact
-                    record.cumulative_deviation = cumulative_fact - cumulative_plan
-                    record.save(update_fields=[
-                        'cumulative_plan', 'cumulative_fact',
-                        'cumulative_deviation', 'updated_at'
-                    ])
+
+        now = timezone.now()
+        columns = (
+            'id', 'blank_id', 'hour_number', 'is_filled', 'cumulative_plan',
+            'cumulative_fact', 'cumulative_deviation', 'is_elapsed',
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                now,
+                *blank_ids,
+                connection.ops.adapt_timefield_value(timezone.localtime(now).time()),
+            ])
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @classmethod
+    def project_completion(cls, blank_ids, recent_hours: int = 3) -> dict:
+        """
+        Прогноз выполнения плана к концу смены.
+
+        Незаполненные часы достраиваются темпом последних recent_hours
+        заполненных часов бланка: остаток плана умножается на долю
+        выполнения плана за эти часы. Считается одним запросом для всех
+        бланков (ROW_NUMBER по заполненным часам и GROUP BY бланка).
+
+        Args:
+            blank_ids: Идентификаторы бланков
+            recent_hours: Сколько последних заполненных часов задают темп
+
+        Returns:
+            dict: {blank_id: {'projected_fact', 'projected_completion',
+                'remaining_plan'}}; projected_* — None, пока нет ни одного
+                заполненного часа с планом
+        """
+        blank_ids = list(blank_ids)
+        if not blank_ids:
+            return {}
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(blank_ids))
+
+        sql = f"""
+            SELECT
+                blank_id,
+                SUM(planned_quantity),
+                SUM(CASE WHEN is_filled THEN actual_quantity ELSE 0 END),
+                SUM(CASE WHEN is_filled THEN 0 ELSE planned_quantity END),
+                SUM(CASE WHEN is_filled AND recent <= %s THEN planned_quantity ELSE 0 END),
+                SUM(CASE WHEN is_filled AND recent <= %s THEN actual_quantity ELSE 0 END)
+            FROM (
+                SELECT
+                    blank_id,
+                    planned_quantity,
+                    actual_quantity,
+                    is_filled,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY blank_id, is_filled
+                        ORDER BY hour_number DESC
+                    ) AS recent
+                FROM {table}
+                WHERE blank_id IN ({placeholders})
+            ) AS ranked
+            GROUP BY blank_id
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [recent_hours, recent_hours, *blank_ids])
+            rows = cursor.fetchall()
+
+        projections = {}
+        for blank_id, plan, fact, remaining, recent_plan, recent_fact in rows:
+            projected_fact = projected_completion = None
+            if recent_plan:
+                projected_fact = fact + round(remaining * recent_fact / recent_plan)
+                if plan:
+                    projected_completion = round(
+                        Decimal(projected_fact) / Decimal(plan) * 100, 2
+                    )
+
+            projections[blank_id] = {
+                'projected_fact': projected_fact,
+                'projected_completion': projected_completion,
+                'remaining_plan': remaining,
+            }
+
+        return projections
 
     @property
     def is_current_hour(self):
@@ -0,0 +1,217 @@
+from django.db.models import (CASCADE, CharField, DateField, DateTimeField,
+                              ForeignKey, Index, IntegerField, Model,
+                              PositiveIntegerField, UniqueConstraint)
+
+
+class ProductionRollup(Model):
+    """
+    Дневной итог выпуска по рабочему месту и смене
+
+    Денормализованная копия итогов бланка с участком и цехом: аналитика
+    за период читает эти строки без соединений с бланками и записями.
+    Поддерживается RollupService при каждом изменении бланка,
+    полностью перестраивается командой rebuild_rollups.
+    """
+
+    class Meta:
+        verbose_name = 'Итог выпуска за день'
+        verbose_name_plural = 'Итоги выпуска за день'
+        ordering = ['-date', 'shift', 'workplace']
+        constraints = [
+            UniqueConstraint(
+                fields=['date', 'shift', 'workplace'],
+                name='unique_production_rollup',
+            ),
+        ]
+        indexes = [
+            Index(fields=['sector', 'date']),
+            Index(fields=['workshop', 'date']),
+        ]
+
+    date = DateField(
+        'Дата',
+    )
+
+    shift = ForeignKey(
+        'shift_report.Shift',
+        verbose_name='Смена',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    workplace = ForeignKey(
+        'shift_report.Workplace',
+        verbose_name='Рабочее место',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    sector = ForeignKey(
+        'shift_report.Sector',
+        verbose_name='Участок',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    workshop = ForeignKey(
+        'shift_report.Workshop',
+        verbose_name='Цех',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    status = CharField(
+        'Статус бланка',
+        max_length=20,
+    )
+
+    total_plan = PositiveIntegerField(
+        'План, шт',
+        default=0,
+    )
+
+    total_fact = PositiveIntegerField(
+        'Факт, шт',
+        default=0,
+    )
+
+    total_deviation = IntegerField(
+        'Отклонение, шт',
+        default=0,
+    )
+
+    total_downtime = PositiveIntegerField(
+        'Простой, мин',
+        default=0,
+    )
+
+    deviations_count = PositiveIntegerField(
+        'Записей об отклонениях',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.date} | {self.shift_id} | {self.workplace_id}'
+
+
+class DeviationRollup(Model):
+    """
+    Дневной итог отклонений по рабочему месту, смене и причине
+
+    Количество записей об отклонениях и суммарная длительность простоя.
+    Поддерживается вместе с ProductionRollup.
+    """
+
+    class Meta:
+        verbose_name = 'Итог отклонений за день'
+        verbose_name_plural = 'Итоги отклонений за день'
+        ordering = ['-date', 'shift', 'workplace', 'reason']
+        constraints = [
+            UniqueConstraint(
+                fields=['date', 'shift', 'workplace', 'reason'],
+                name='unique_deviation_rollup',
+            ),
+        ]
+        indexes = [
+            Index(fields=['sector', 'date']),
+            Index(fields=['workshop', 'date']),
+        ]
+
+    date = DateField(
+        'Дата',
+    )
+
+    shift = ForeignKey(
+        'shift_report.Shift',
+        verbose_name='Смена',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    workplace = ForeignKey(
+        'shift_report.Workplace',
+        verbose_name='Рабочее место',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    sector = ForeignKey(
+        'shift_report.Sector',
+        verbose_name='Участок',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    workshop = ForeignKey(
+        'shift_report.Workshop',
+        verbose_name='Цех',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    reason = ForeignKey(
+        'shift_report.DeviationReason',
+        verbose_name='Причина отклонения',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    entries_count = PositiveIntegerField(
+        'Записей',
+        default=0,
+    )
+
+    duration_minutes = PositiveIntegerField(
+        'Длительность, мин',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.date} | {self.workplace_id} | {self.reason_id}'
+
+
+class DirtyRollup(Model):
+    """
+    Ключ итогов, ожидающий повторного пересчёта
+
+    RollupService записывает ключ (дата, смена, РМ), если пересчёт
+    после фиксации изменения бланка не удался; команда close_shifts
+    пересчитывает такие ключи при каждой проверке.
+    """
+
+    class Meta:
+        verbose_name = 'Итог к пересчёту'
+        verbose_name_plural = 'Итоги к пересчёту'
+        ordering = ['created_at']
+        constraints = [
+            UniqueConstraint(
+                fields=['date', 'shift', 'workplace'],
+                name='unique_dirty_rollup',
+            ),
+        ]
+
+    date = DateField(
+        'Дата',
+    )
+
+    shift = ForeignKey(
+        'shift_report.Shift',
+        verbose_name='Смена',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    workplace = ForeignKey(
+        'shift_report.Workplace',
+        verbose_name='Рабочее место',
+        related_name='+',
+        on_delete=CASCADE,
+    )
+
+    created_at = DateTimeField(
+        'Отмечен',
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f'{self.date} | {self.shift_id} | {self.workplace_id}'
@@ -0,0 +1,56 @@
+from django.db.models import (CASCADE, SET_NULL, CharField, DateTimeField,
+                              ForeignKey, Index, Model)
+
+
+class SyncOperation(Model):
+    """
+    Операция офлайн-синхронизации
+
+    Фиксирует обновление записи ПА, поступившее из локальной очереди
+    планшета оператора. Ключ идемпотентности генерируется на устройстве,
+    поэтому повторная доставка той же операции ничего не меняет.
+    """
+
+    class Meta:
+        verbose_name = 'Операция синхронизации'
+        verbose_name_plural = 'Операции синхронизации'
+        ordering = ['-applied_at']
+        indexes = [
+            Index(fields=['applied_at']),
+        ]
+
+    idempotency_key = CharField(
+        'Ключ идемпотентности',
+        max_length=64,
+        unique=True,
+        help_text='Генерируется устройством оператора',
+    )
+
+    record = ForeignKey(
+        'shift_report.PARecord',
+        verbose_name='Запись ПА',
+        related_name='sync_operations',
+        on_delete=CASCADE,
+    )
+
+    employee = ForeignKey(
+        'shift_report.Employee',
+        verbose_name='Сотрудник',
+        related_name='sync_operations',
+        on_delete=SET_NULL,
+        null=True,
+    )
+
+    client_created_at = DateTimeField(
+        'Создано на устройстве',
+        null=True,
+        blank=True,
+    )
+
+    applied_at = DateTimeField(
+        'Применено',
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f'{self.idempotency_key} | {self.record}'
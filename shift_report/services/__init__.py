@@ -1,9 +1,28 @@
-from .analytics import AnalyticsService
+from .alerts import AlertEngine, AlertService
+from .analytics import AnalyticsCache, AnalyticsService
 from .blank_generator import BlankGeneratorService
+from .change_feed import BlankChangeFeed
+from .columnar import ColumnarPayload, compact_json_response
 from .import_export import ImportExportService
+from .monitoring import MonitoringService
+from .reason_catalog import ReasonCatalog
+from .record_input import RecordInputService
+from .rollups import RollupService
+from .shift_close import ShiftCloseService
 
 __all__ = [
     'BlankGeneratorService',
     'AnalyticsService',
+    'AnalyticsCache',
+    'AlertEngine',
+    'AlertService',
+    'BlankChangeFeed',
+    'ColumnarPayload',
     'ImportExportService',
+    'MonitoringService',
+    'RecordInputService',
+    'RollupService',
+    'ReasonCatalog',
+    'ShiftCloseService',
+    'compact_json_response',
 ]
@@ -0,0 +1,249 @@
+"""
+Оповещения мастера о недовыпуске и простоях.
+
+FR-020: Карточки рабочих мест с real-time статусом
+FR-025: Фиксация принятых мер
+
+Правила проверяются в пути записи (RecordInputService) сразу после
+пересчёта накопительных показателей. Правила меняются редко, поэтому
+хранятся в памяти процесса в скомпилированном виде — по рабочим местам —
+и перечитываются из БД только при смене версии или по истечении TTL.
+Проверка не обращается к БД, пока правило не сработало: накопительное
+отклонение берётся из результата пересчёта (RETURNING).
+"""
+
+import threading
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from shift_report.models import Alert, AlertMetric, AlertRule, Workplace
+
+
+class AlertEngine:
+    """
+    Версионируемый in-process кэш правил и их проверка.
+
+    Правило участка разворачивается в правила его рабочих мест при
+    загрузке, поэтому для проверки достаточно workplace_id бланка.
+    Версия хранится в кэше Django (как у ReasonCatalog).
+    """
+
+    VERSION_KEY = 'shift_report:alert_rules:version'
+    TTL_SECONDS = 300
+
+    _lock = threading.Lock()
+    _version = None
+    _loaded_at = 0.0
+    _global = ()
+    _by_workplace = {}
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Сброс кэша (при изменении правила или рабочего места)"""
+        cache.set(cls.VERSION_KEY, uuid4().hex, None)
+        with cls._lock:
+            cls._version = None
+
+    @classmethod
+    def get_rules(cls, workplace_id: int) -> tuple:
+        """
+        Активные правила рабочего места.
+
+        Returns:
+            tuple: Правила (rule_id, metric, threshold)
+        """
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            version = uuid4().hex
+            cache.add(cls.VERSION_KEY, version, None)
+            version = cache.get(cls.VERSION_KEY, version)
+
+        with cls._lock:
+            expired = time.monotonic() - cls._loaded_at > cls.TTL_SECONDS
+            if cls._version != version or expired:
+                cls._global, cls._by_workplace = cls._load()
+                cls._version = version
+                cls._loaded_at = time.monotonic()
+            return cls._global + cls._by_workplace.get(workplace_id, ())
+
+    @classmethod
+    def check(cls, blank, records, downtime: dict = None, changed=()) -> list[Alert]:
+        """
+        Проверка сохранённых записей и создание оповещений.
+
+        Вызывается внутри транзакции записи после пересчёта накопительных
+        показателей. Повторные срабатывания отбрасываются по ключу
+        дедупликации.
+
+        Args:
+            blank: Бланк ПА
+            records: Сохранённые записи бланка
+            downtime: Простой по записям, мин ({record_id: минуты});
+                записи без значения по простою не проверяются
+            changed: Записи, изменённые PARecord.recalculate_cumulative;
+                для остальных накопительное отклонение не изменилось
+
+        Returns:
+            list[Alert]: Новые оповещения (без учёта дедупликации)
+        """
+        rules = cls.get_rules(blank.workplace_id)
+        if not rules:
+            return []
+
+        downtime = downtime or {}
+        cumulative = {row['id']: row['cumulative_deviation'] for row in changed}
+
+        alerts = []
+        for record in records:
+            values = {
+                AlertMetric.HOURLY_DEVIATION: -record.deviation,
+                AlertMetric.CUMULATIVE_DEVIATION: -cumulative.get(
+                    record.pk, record.cumulative_deviation
+                ),
+                AlertMetric.DOWNTIME: downtime.get(record.pk),
+            }
+
+            for rule_id, metric, threshold in rules:
+                value = values[metric]
+                if value is None or value < threshold:
+                    continue
+
+                # Накопительное отклонение — одно оповещение на бланк
+                if metric == AlertMetric.CUMULATIVE_DEVIATION:
+                    dedupe_key = f'{rule_id}:{blank.pk}'
+                else:
+                    dedupe_key = f'{rule_id}:{blank.pk}:{record.hour_number}'
+
+                alerts.append(Alert(
+                    rule_id=rule_id,
+                    blank_id=blank.pk,
+                    record_id=record.pk,
+                    metric=metric,
+                    value=value if metric == AlertMetric.DOWNTIME else -value,
+                    threshold=threshold,
+                    dedupe_key=dedupe_key,
+                ))
+
+        if alerts:
+            Alert.objects.bulk_create(alerts, ignore_conflicts=True)
+
+        return alerts
+
+    @classmethod
+    def _load(cls) -> tuple:
+        """Загрузка и компиляция правил (два запроса)"""
+        rules = list(AlertRule.objects.filter(is_active=True, threshold__gt=0).values_list(
+            'pk', 'metric', 'threshold', 'sector_id', 'workplace_id',
+        ))
+
+        sector_ids = {
+            sector_id for _, _, _, sector_id, workplace_id in rules
+            if sector_id and not workplace_id
+        }
+        sector_workplaces = {}
+        for workplace_id, sector_id in Workplace.objects.filter(
+            sector_id__in=sector_ids
+        ).values_list('pk', 'sector_id'):
+            sector_workplaces.setdefault(sector_id, []).append(workplace_id)
+
+        global_rules = []
+        by_workplace = {}
+        for rule_id, metric, threshold, sector_id, workplace_id in rules:
+            compiled = (rule_id, metric, threshold)
+            if workplace_id:
+                by_workplace.setdefault(workplace_id, []).append(compiled)
+            elif sector_id:
+                for sector_workplace_id in sector_workplaces.get(sector_id, []):
+                    by_workplace.setdefault(sector_workplace_id, []).append(compiled)
+            else:
+                global_rules.append(compiled)
+
+        return tuple(global_rules), {
+            workplace_id: tuple(compiled)
+            for workplace_id, compiled in by_workplace.items()
+        }
+
+
+class AlertService:
+    """
+    Оповещения для панели мониторинга.
+
+    Основные функции:
+    - Новые непросмотренные оповещения в области пользователя
+    - Отметка о просмотре
+    """
+
+    def get_scope_alerts(self, user):
+        """Оповещения в пределах участка или цеха пользователя"""
+        alerts = Alert.objects.all()
+
+        if user.sector:
+            alerts = alerts.filter(blank__workplace__sector=user.sector)
+        elif user.workshop:
+            alerts = alerts.filter(blank__workplace__sector__workshop=user.workshop)
+
+        return alerts
+
+    def get_pending(self, user, after: int = 0, limit: int = 50) -> list[dict]:
+        """
+        Непросмотренные оповещения сегодняшних бланков.
+
+        Args:
+            user: Сотрудник
+            after: Идентификатор последнего полученного оповещения
+            limit: Максимальное количество
+
+        Returns:
+            list[dict]: Оповещения по возрастанию идентификатора
+        """
+        rows = self.get_scope_alerts(user).filter(
+            pk__gt=after,
+            acknowledged_at__isnull=True,
+            blank__date=timezone.localdate(),
+        ).order_by('pk').values(
+            'pk',
+            'blank_id',
+            'metric',
+            'value',
+            'threshold',
+            'created_at',
+            'rule__name',
+            'record__hour_number',
+            'blank__workplace__name',
+        )[:limit]
+
+        metric_labels = dict(AlertMetric.choices)
+
+        return [
+            {
+                'id': row['pk'],
+                'blank_id': row['blank_id'],
+                'metric': row['metric'],
+                'metric_display': metric_labels[row['metric']],
+                'value': row['value'],
+                'threshold': row['threshold'],
+                'rule': row['rule__name'],
+                'hour_number': row['record__hour_number'],
+                'workplace_name': row['blank__workplace__name'],
+                'created_at': row['created_at'].isoformat(),
+            }
+            for row in rows
+        ]
+
+    def acknowledge(self, user, alert_ids) -> int:
+        """
+        Отметка о просмотре оповещений.
+
+        Returns:
+            int: Количество отмеченных оповещений
+        """
+        return self.get_scope_alerts(user).filter(
+            pk__in=alert_ids,
+            acknowledged_at__isnull=True,
+        ).update(
+            acknowledged_at=timezone.now(),
+            acknowledged_by=user,
+        )
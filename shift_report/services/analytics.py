@@ -4,21 +4,56 @@
 FR-026: Дашборды и аналитика
 FR-027: Анализ отклонений по категориям
 FR-028: Сравнительный анализ
+FR-029: Drill-down анализ
+
+Итоги выпуска и отклонений за период читаются из дневных итоговых таблиц
+(ProductionRollup, DeviationRollup), а не из бланков и записей.
 """
-from datetime import date
+from datetime import date, timedelta
 from typing import Any
 
-from django.db.models import Avg, Count, Sum
+from django.core.cache import cache
+from django.db.models import (Count, F, Func, IntegerField, Q, RowRange, Sum,
+                              Window)
+from django.utils import timezone
 
-from shift_report.models import (DeviationEntry, PABlank, PARecord, Sector,
+from shift_report.models import (DeviationRollup, PABlank, PABlankStatus,
+                                 PARecord, ProductionRollup, Sector, Workplace,
                                  Workshop)
 
 
+class SumOfAggregate(Func):
+    """
+    SUM(агрегат) для оконных выражений поверх GROUP BY.
+
+    Sum() не принимает агрегат аргументом, а оконная сумма по группам
+    требует именно SUM(SUM(...)) OVER (...).
+    """
+
+    function = 'SUM'
+    window_compatible = True
+    output_field = IntegerField()
+
+
 class AnalyticsService:
     """
     Сервис для расчёта аналитических показателей.
     """
 
+    def _rollups(self, model, date_from, date_to, workshop=None, sector=None):
+        """Строки итоговой таблицы за период в пределах участка или цеха"""
+        rows = model.objects.filter(
+            date__gte=date_from,
+            date__lte=date_to,
+        )
+
+        if sector:
+            rows = rows.filter(sector=sector)
+        elif workshop:
+            rows = rows.filter(workshop=workshop)
+
+        return rows
+
     def get_dashboard_summary(
         self,
         date_from: 'date',
@@ -29,15 +64,7 @@ class AnalyticsService:
         """
         Сводная статистика для дашборда.
         """
-        blanks = PABlank.objects.filter(
-            date__gte=date_from,
-            date__lte=date_to,
-        )
-
-        if sector:
-            blanks = blanks.filter(workplace__sector=sector)
-        elif workshop:
-            blanks = blanks.filter(workplace__sector__workshop=workshop)
+        blanks = self._rollups(ProductionRollup, date_from, date_to, workshop, sector)
 
         # Агрегируем данные
         totals = blanks.aggregate(
@@ -46,6 +73,7 @@ class AnalyticsService:
             total_deviation=Sum('total_deviation'),
             total_downtime=Sum('total_downtime'),
             blanks_count=Count('id'),
+            deviations_count=Sum('deviations_count'),
         )
 
         # Процент выполнения
@@ -63,11 +91,6 @@ class AnalyticsService:
         )
         statuses = {item['status']: item['count'] for item in status_counts}
 
-        # Количество отклонений
-        deviations_count = DeviationEntry.objects.filter(
-            record__blank__in=blanks
-        ).count()
-
         return {
             'total_plan': total_plan,
             'total_fact': total_fact,
@@ -75,7 +98,7 @@ class AnalyticsService:
             'total_downtime': totals['total_downtime'] or 0,
             'completion_percentage': completion_percentage,
             'blanks_count': totals['blanks_count'] or 0,
-            'deviations_count': deviations_count,
+            'deviations_count': totals['deviations_count'] or 0,
             'statuses': statuses,
         }
 
@@ -89,15 +112,7 @@ class AnalyticsService:
         """
         Динамика по дням для графика.
         """
-        blanks = PABlank.objects.filter(
-            date__gte=date_from,
-            date__lte=date_to,
-        )
-
-        if sector:
-            blanks = blanks.filter(workplace__sector=sector)
-        elif workshop:
-            blanks = blanks.filter(workplace__sector__workshop=workshop)
+        blanks = self._rollups(ProductionRollup, date_from, date_to, workshop, sector)
 
         daily_data = blanks.values('date').annotate(
             plan=Sum('total_plan'),
@@ -135,26 +150,14 @@ class AnalyticsService:
         Анализ отклонений по категориям (группам причин).
         FR-027
         """
-        deviations = DeviationEntry.objects.filter(
-            record__blank__date__gte=date_from,
-            record__blank__date__lte=date_to,
-        ).select_related('reason__group')
-
-        if sector:
-            deviations = deviations.filter(
-                record__blank__workplace__sector=sector
-            )
-        elif workshop:
-            deviations = deviations.filter(
-                record__blank__workplace__sector__workshop=workshop
-            )
+        deviations = self._rollups(DeviationRollup, date_from, date_to, workshop, sector)
 
         by_group = deviations.values(
             'reason__group__name',
             'reason__group__color',
             'reason__group__code',
         ).annotate(
-            count=Count('id'),
+            count=Sum('entries_count'),
             total_duration=Sum('duration_minutes'),
         ).order_by('-count')
 
@@ -185,19 +188,7 @@ class AnalyticsService:
         """
         Топ причин отклонений.
         """
-        deviations = DeviationEntry.objects.filter(
-            record__blank__date__gte=date_from,
-            record__blank__date__lte=date_to,
-        ).select_related('reason', 'reason__group')
-
-        if sector:
-            deviations = deviations.filter(
-                record__blank__workplace__sector=sector
-            )
-        elif workshop:
-            deviations = deviations.filter(
-                record__blank__workplace__sector__workshop=workshop
-            )
+        deviations = self._rollups(DeviationRollup, date_from, date_to, workshop, sector)
 
         top_reasons = deviations.values(
             'reason__name',
@@ -205,7 +196,7 @@ class AnalyticsService:
             'reason__group__name',
             'reason__group__color',
         ).annotate(
-            count=Count('id'),
+            count=Sum('entries_count'),
             total_duration=Sum('duration_minutes'),
         ).order_by('-count')[:limit]
 
@@ -221,56 +212,212 @@ class AnalyticsService:
             for item in top_reasons
         ]
 
-    def get_workplace_comparison(
+    def get_dashboard_bundle(
         self,
         date_from: 'date',
         date_to: 'date',
         workshop: Workshop = None,
         sector: Sector = None,
-    ) -> list[dict]:
+        top_limit: int = 5,
+    ) -> dict[str, Any]:
         """
-        Сравнительный анализ по рабочим местам.
-        FR-028
+        Все панели дашборда из дневных частичных итогов.
+
+        Для каждого дня периода берутся две выборки: итоги выпуска
+        по статусам и отклонения по причинам. Дни, которых нет в кэше
+        (AnalyticsCache), читаются двумя запросами на все сразу; закрытые
+        дни кэшируются бессрочно, поэтому повторная загрузка дашборда
+        пересчитывает только сегодняшний день. Результат совпадает
+        с get_dashboard_summary, get_daily_dynamics,
+        get_deviations_by_category и get_top_deviations.
+
+        Returns:
+            dict: summary, daily_dynamics, deviations_by_category, top_deviations
         """
-        blanks = PABlank.objects.filter(
-            date__gte=date_from,
-            date__lte=date_to,
+        days = AnalyticsCache.get_days(
+            'dashboard', date_from, date_to, workshop, sector, self._dashboard_days
         )
 
-        if sector:
-            blanks = blanks.filter(workplace__sector=sector)
-        elif workshop:
-            blanks = blanks.filter(workplace__sector__workshop=workshop)
+        summary = {
+            'total_plan': 0,
+            'total_fact': 0,
+            'total_deviation': 0,
+            'total_downtime': 0,
+            'blanks_count': 0,
+            'deviations_count': 0,
+            'statuses': {},
+        }
+        daily_dynamics = []
+        reasons = {}
 
-        workplace_data = blanks.values(
-            'workplace__id',
-            'workplace__name',
-            'workplace__sector__name',
+        for day, partial in sorted(days.items()):
+            if partial['production']:
+                plan = fact = deviation = blanks = 0
+                for row in partial['production']:
+                    plan += row['plan'] or 0
+                    fact += row['fact'] or 0
+                    deviation += row['deviation'] or 0
+                    blanks += row['blanks']
+                    summary['total_downtime'] += row['downtime'] or 0
+                    summary['deviations_count'] += row['deviations'] or 0
+                    summary['statuses'][row['status']] = (
+                        summary['statuses'].get(row['status'], 0) + row['blanks']
+                    )
+
+                summary['total_plan'] += plan
+                summary['total_fact'] += fact
+                summary['total_deviation'] += deviation
+                summary['blanks_count'] += blanks
+
+                daily_dynamics.append({
+                    'date': day.isoformat(),
+                    'date_display': day.strftime('%d.%m'),
+                    'plan': plan,
+                    'fact': fact,
+                    'deviation': deviation,
+                    'completion': self._completion(plan, fact),
+                    'blanks': blanks,
+                })
+
+            for row in partial['reasons']:
+                reason = reasons.setdefault(row['reason_id'], {
+                    **row, 'count': 0, 'total_duration': 0,
+                })
+                reason['count'] += row['count']
+                reason['total_duration'] += row['total_duration'] or 0
+
+        summary['completion_percentage'] = self._completion(
+            summary['total_plan'], summary['total_fact']
+        )
+
+        reasons = sorted(reasons.values(), key=lambda item: -item['count'])
+
+        groups = {}
+        for item in reasons:
+            group = groups.setdefault(item['reason__group__name'], {
+                'group_name': item['reason__group__name'],
+                'group_code': item['reason__group__code'],
+                'group_color': item['reason__group__color'],
+                'count': 0,
+                'duration': 0,
+            })
+            group['count'] += item['count']
+            group['duration'] += item['total_duration']
+
+        total_count = sum(group['count'] for group in groups.values())
+        deviations_by_category = sorted(groups.values(), key=lambda group: -group['count'])
+        for group in deviations_by_category:
+            group['percentage'] = round(group['count'] / total_count * 100, 1) if total_count > 0 else 0
+
+        top_deviations = [
+            {
+                'reason_name': item['reason__name'],
+                'reason_code': item['reason__code'],
+                'group_name': item['reason__group__name'],
+                'group_color': item['reason__group__color'],
+                'count': item['count'],
+                'duration': item['total_duration'],
+            }
+            for item in reasons[:top_limit]
+        ]
+
+        return {
+            'summary': summary,
+            'daily_dynamics': daily_dynamics,
+            'deviations_by_category': deviations_by_category,
+            'top_deviations': top_deviations,
+        }
+
+    def _dashboard_days(self, days, workshop=None, sector=None) -> dict:
+        """
+        Дневные частичные итоги дашборда (два запроса на все дни).
+
+        Returns:
+            dict: {дата: {'production': [...], 'reasons': [...], 'open': bool}};
+                open — в дне есть незакрытые бланки
+        """
+        date_from, date_to = min(days), max(days)
+        partials = {
+            day: {'production': [], 'reasons': [], 'open': False}
+            for day in days
+        }
+
+        production = self._rollups(
+            ProductionRollup, date_from, date_to, workshop, sector
+        ).filter(date__in=days).values('date', 'status').annotate(
+            plan=Sum('total_plan'),
+            fact=Sum('total_fact'),
+            deviation=Sum('total_deviation'),
+            downtime=Sum('total_downtime'),
+            blanks=Count('id'),
+            deviations=Sum('deviations_count'),
+        ).order_by()
+
+        for row in production:
+            partial = partials[row.pop('date')]
+            partial['production'].append(row)
+            if row['status'] in (PABlankStatus.DRAFT, PABlankStatus.ACTIVE):
+                partial['open'] = True
+
+        reasons = self._rollups(
+            DeviationRollup, date_from, date_to, workshop, sector
+        ).filter(date__in=days).values(
+            'date',
+            'reason_id',
+            'reason__name',
+            'reason__code',
+            'reason__group__name',
+            'reason__group__color',
+            'reason__group__code',
         ).annotate(
-            total_plan=Sum('total_plan'),
-            total_fact=Sum('total_fact'),
-            total_deviation=Sum('total_deviation'),
-            total_downtime=Sum('total_downtime'),
-            blanks_count=Count('id'),
-        ).order_by('-total_fact')
+            count=Sum('entries_count'),
+            total_duration=Sum('duration_minutes'),
+        ).order_by()
 
-        result = []
-        for item in workplace_data:
-            plan = item['total_plan'] or 0
-            fact = item['total_fact'] or 0
-            completion = round(fact / plan * 100, 1) if plan > 0 else 0
+        for row in reasons:
+            partials[row.pop('date')]['reasons'].append(row)
 
-            result.append({
-                'workplace_id': item['workplace__id'],
-                'workplace_name': item['workplace__name'],
-                'sector_name': item['workplace__sector__name'],
-                'total_plan': plan,
-                'total_fact': fact,
-                'total_deviation': item['total_deviation'] or 0,
-                'total_downtime': item['total_downtime'] or 0,
-                'completion': completion,
-                'blanks_count': item['blanks_count'],
+        return partials
+
+    @staticmethod
+    def _completion(plan, fact) -> float:
+        """Процент выполнения с одним знаком"""
+        return round(fact / plan * 100, 1) if plan > 0 else 0
+
+    def get_workplace_comparison(
+        self,
+        date_from: 'date',
+        date_to: 'date',
+        workshop: Workshop = None,
+        sector: Sector = None,
+    ) -> list[dict]:
+        """
+        Сравнительный анализ по рабочим местам.
+        FR-028
+
+        Суммируется из дневных частичных итогов сравнения (AnalyticsCache).
+        """
+        workplaces = {}
+        for row in self._comparison_rows(date_from, date_to, workshop, sector):
+            item = workplaces.setdefault(row['workplace_id'], {
+                'workplace_id': row['workplace_id'],
+                'workplace_name': row['workplace__name'],
+                'sector_name': row['sector__name'],
+                'total_plan': 0,
+                'total_fact': 0,
+                'total_deviation': 0,
+                'total_downtime': 0,
+                'blanks_count': 0,
             })
+            item['total_plan'] += row['total_plan']
+            item['total_fact'] += row['total_fact']
+            item['total_deviation'] += row['total_deviation']
+            item['total_downtime'] += row['total_downtime']
+            item['blanks_count'] += 1
+
+        result = sorted(workplaces.values(), key=lambda item: -item['total_fact'])
+        for item in result:
+            item['completion'] = self._completion(item['total_plan'], item['total_fact'])
 
         return result
 
@@ -283,44 +430,73 @@ class AnalyticsService:
     ) -> list[dict]:
         """
         Сравнительный анализ по сменам.
+
+        Суммируется из тех же дневных частичных итогов, что и сравнение
+        рабочих мест.
         """
-        blanks = PABlank.objects.filter(
-            date__gte=date_from,
-            date__lte=date_to,
+        shifts = {}
+        for row in self._comparison_rows(date_from, date_to, workshop, sector):
+            item = shifts.setdefault((row['shift__number'], row['shift__name']), {
+                'shift_name': row['shift__name'],
+                'shift_number': row['shift__number'],
+                'total_plan': 0,
+                'total_fact': 0,
+                'total_deviation': 0,
+                'blanks_count': 0,
+            })
+            item['total_plan'] += row['total_plan']
+            item['total_fact'] += row['total_fact']
+            item['total_deviation'] += row['total_deviation']
+            item['blanks_count'] += 1
+
+        result = [item for _, item in sorted(shifts.items())]
+        for item in result:
+            item['completion'] = self._completion(item['total_plan'], item['total_fact'])
+
+        return result
+
+    def _comparison_rows(self, date_from, date_to, workshop, sector) -> list[dict]:
+        """Итоги бланков периода для сравнения рабочих мест и смен"""
+        days = AnalyticsCache.get_days(
+            'comparison', date_from, date_to, workshop, sector, self._comparison_days
         )
 
-        if sector:
-            blanks = blanks.filter(workplace__sector=sector)
-        elif workshop:
-            blanks = blanks.filter(workplace__sector__workshop=workshop)
+        return [row for partial in days.values() for row in partial['rows']]
+
+    def _comparison_days(self, days, workshop=None, sector=None) -> dict:
+        """
+        Дневные частичные итоги сравнения (один запрос на все дни).
 
-        shift_data = blanks.values(
+        Returns:
+            dict: {дата: {'rows': [...], 'open': bool}}; строка — итоги
+                одного бланка (рабочее место за смену)
+        """
+        date_from, date_to = min(days), max(days)
+        partials = {day: {'rows': [], 'open': False} for day in days}
+
+        rows = self._rollups(
+            ProductionRollup, date_from, date_to, workshop, sector
+        ).filter(date__in=days).values(
+            'date',
+            'status',
+            'workplace_id',
+            'workplace__name',
+            'sector__name',
             'shift__name',
             'shift__number',
-        ).annotate(
-            total_plan=Sum('total_plan'),
-            total_fact=Sum('total_fact'),
-            total_deviation=Sum('total_deviation'),
-            blanks_count=Count('id'),
-        ).order_by('shift__number')
+            'total_plan',
+            'total_fact',
+            'total_deviation',
+            'total_downtime',
+        ).order_by()
 
-        result = []
-        for item in shift_data:
-            plan = item['total_plan'] or 0
-            fact = item['total_fact'] or 0
-            completion = round(fact / plan * 100, 1) if plan > 0 else 0
+        for row in rows:
+            partial = partials[row.pop('date')]
+            partial['rows'].append(row)
+            if row['status'] in (PABlankStatus.DRAFT, PABlankStatus.ACTIVE):
+                partial['open'] = True
 
-            result.append({
-                'shift_name': item['shift__name'],
-                'shift_number': item['shift__number'],
-                'total_plan': plan,
-                'total_fact': fact,
-                'total_deviation': item['total_deviation'] or 0,
-                'completion': completion,
-                'blanks_count': item['blanks_count'],
-            })
-
-        return result
+        return partials
 
     def get_hourly_pattern(
         self,
@@ -331,72 +507,524 @@ class AnalyticsService:
     ) -> list[dict]:
         """
         Почасовой паттерн выполнения плана.
+
+        Средние по заполненным записям считаются из дневных сумм
+        и количеств по часам (AnalyticsCache).
         """
-        records = PARecord.objects.filter(
-            blank__date__gte=date_from,
-            blank__date__lte=date_to,
-            is_filled=True,
+        days = AnalyticsCache.get_days(
+            'hourly', date_from, date_to, workshop, sector, self._hourly_days
         )
 
-        if sector:
-            records = records.filter(blank__workplace__sector=sector)
-        elif workshop:
-            records = records.filter(blank__workplace__sector__workshop=workshop)
-
-        hourly_data = records.values('hour_number').annotate(
-            avg_plan=Avg('planned_quantity'),
-            avg_fact=Avg('actual_quantity'),
-            total_plan=Sum('planned_quantity'),
-            total_fact=Sum('actual_quantity'),
-            records_count=Count('id'),
-        ).order_by('hour_number')
+        hours = {}
+        for partial in days.values():
+            for row in partial['hours']:
+                item = hours.setdefault(row['hour_number'], {'plan': 0, 'fact': 0, 'records': 0})
+                item['plan'] += row['plan']
+                item['fact'] += row['fact']
+                item['records'] += row['records']
 
         result = []
-        for item in hourly_data:
-            avg_plan = float(item['avg_plan'] or 0)
-            avg_fact = float(item['avg_fact'] or 0)
+        for hour, item in sorted(hours.items()):
+            avg_plan = item['plan'] / item['records']
+            avg_fact = item['fact'] / item['records']
             completion = round(avg_fact / avg_plan * 100, 1) if avg_plan > 0 else 0
 
             result.append({
-                'hour': item['hour_number'],
+                'hour': hour,
                 'avg_plan': round(avg_plan, 1),
                 'avg_fact': round(avg_fact, 1),
                 'completion': completion,
-                'records_count': item['records_count'],
+                'records_count': item['records'],
             })
 
         return result
 
+    def _hourly_days(self, days, workshop=None, sector=None) -> dict:
+        """
+        Дневные суммы заполненных записей по часам (один запрос на все дни).
+
+        Returns:
+            dict: {дата: {'hours': [...], 'open': bool}}
+        """
+        partials = {day: {'hours': [], 'open': False} for day in days}
+        filled = Q(is_filled=True)
+
+        records = PARecord.objects.filter(
+            blank__date__gte=min(days),
+            blank__date__lte=max(days),
+            blank__date__in=days,
+        )
+
+        if sector:
+            records = records.filter(blank__workplace__sector=sector)
+        elif workshop:
+            records = records.filter(blank__workplace__sector__workshop=workshop)
+
+        rows = records.values('blank__date', 'hour_number').annotate(
+            plan=Sum('planned_quantity', filter=filled),
+            fact=Sum('actual_quantity', filter=filled),
+            records=Count('id', filter=filled),
+            open=Count('id', filter=Q(
+                blank__status__in=[PABlankStatus.DRAFT, PABlankStatus.ACTIVE],
+            )),
+        ).order_by()
+
+        for row in rows:
+            partial = partials[row['blank__date']]
+            if row['open']:
+                partial['open'] = True
+            if row['records']:
+                partial['hours'].append({
+                    'hour_number': row['hour_number'],
+                    'plan': row['plan'],
+                    'fact': row['fact'],
+                    'records': row['records'],
+                })
+
+        return partials
+
     def get_pareto_analysis(
         self,
         date_from: 'date',
         date_to: 'date',
         workshop: Workshop = None,
         sector: Sector = None,
+        top: int = 10,
+        cutoff: int = 80,
     ) -> dict:
         """
-        Анализ Парето для причин отклонений.
+        Анализ Парето для причин отклонений по времени простоя.
+
+        Полное распределение длительности по всем причинам считается одним
+        запросом: GROUP BY причины и оконные суммы — нарастающий итог
+        по убыванию длительности и общий итог. Причины за пределами топа
+        объединяются в «Прочие». Результат кэшируется по (область, период),
+        как и drill-down: окно считается одним запросом за весь период.
+
+        Args:
+            top: Количество причин, выводимых отдельно
+            cutoff: Граница Парето, %
+
+        Returns:
+            dict: data (топ причин), other (прочие или None), total_duration,
+                reasons_count, vital_few_count — сколько первых причин
+                дают cutoff % простоя
         """
-        top_reasons = self.get_top_deviations(
-            date_from, date_to, workshop, sector, limit=20
+        return AnalyticsCache.get_range(
+            'pareto',
+            f'{top}:{cutoff}',
+            date_from,
+            date_to,
+            workshop,
+            sector,
+            lambda: self._pareto(date_from, date_to, workshop, sector, top, cutoff),
         )
 
-        total_duration = sum(r['duration'] for r in top_reasons)
-        cumulative = 0
+    def _pareto(self, date_from, date_to, workshop, sector, top, cutoff) -> dict:
+        """Распределение простоя по причинам (один запрос)"""
+        ordering = [F('duration').desc(), F('reason_id').asc()]
+
+        rows = self._rollups(
+            DeviationRollup, date_from, date_to, workshop, sector
+        ).values(
+            'reason_id',
+            'reason__name',
+            'reason__code',
+            'reason__group__name',
+            'reason__group__color',
+        ).annotate(
+            count=Sum('entries_count'),
+            duration=Sum('duration_minutes'),
+        ).annotate(
+            running=Window(
+                SumOfAggregate(Sum('duration_minutes')),
+                order_by=ordering,
+                frame=RowRange(start=None, end=0),
+            ),
+            total=Window(SumOfAggregate(Sum('duration_minutes'))),
+        ).order_by(*ordering)
+
         pareto_data = []
+        other = None
+        total_duration = 0
+        reasons_count = 0
+        vital_few_count = 0
+
+        for position, item in enumerate(rows, start=1):
+            total_duration = item['total'] or 0
+            reasons_count = position
+            duration = item['duration'] or 0
+
+            # Причина входит в «немногие важные», если до неё граница не достигнута
+            is_vital = total_duration > 0 and (item['running'] - duration) * 100 < cutoff * total_duration
+            if is_vital:
+                vital_few_count = position
 
-        for reason in top_reasons:
-            cumulative += reason['duration']
-            percentage = round(reason['duration'] / total_duration * 100, 1) if total_duration > 0 else 0
-            cumulative_percentage = round(cumulative / total_duration * 100, 1) if total_duration > 0 else 0
+            if position > top:
+                if other is None:
+                    other = {'reasons_count': 0, 'count': 0, 'duration': 0}
+                other['reasons_count'] += 1
+                other['count'] += item['count']
+                other['duration'] += duration
+                continue
 
             pareto_data.append({
-                **reason,
-                'percentage': percentage,
-                'cumulative_percentage': cumulative_percentage,
+                'reason_name': item['reason__name'],
+                'reason_code': item['reason__code'],
+                'group_name': item['reason__group__name'],
+                'group_color': item['reason__group__color'],
+                'count': item['count'],
+                'duration': duration,
+                'percentage': self._share(duration, total_duration),
+                'cumulative_percentage': self._share(item['running'], total_duration),
+                'is_vital': is_vital,
             })
 
+        if other:
+            other['percentage'] = self._share(other['duration'], total_duration)
+
         return {
             'data': pareto_data,
+            'other': other,
             'total_duration': total_duration,
+            'reasons_count': reasons_count,
+            'vital_few_count': vital_few_count,
+            'cutoff': cutoff,
         }
+
+    @staticmethod
+    def _share(part, total) -> float:
+        """Доля в процентах с одним знаком"""
+        return round(part / total * 100, 1) if total > 0 else 0
+
+    # Уровни drill-down: уровень узла -> (уровень потомков, поле узла в итогах,
+    # поля группировки потомков)
+    DRILLDOWN_LEVELS = {
+        'enterprise': ('workshop', None, ('workshop_id', 'workshop__name')),
+        'workshop': ('sector', 'workshop_id', ('sector_id', 'sector__name')),
+        'sector': ('workplace', 'sector_id', ('workplace_id', 'workplace__name')),
+        'workplace': ('blank', None, None),
+        'blank': ('hour', None, None),
+    }
+
+    def get_drilldown(
+        self,
+        level: str,
+        node_id: int | None,
+        date_from: 'date',
+        date_to: 'date',
+        workshop: Workshop = None,
+        sector: Sector = None,
+    ) -> list[dict]:
+        """
+        Итоги потомков узла иерархии для drill-down.
+        FR-029
+
+        Цех → участок → рабочее место → бланк → час. Потомки каждого уровня
+        считаются одним GROUP BY: уровни до рабочего места — по итоговым
+        таблицам, бланки рабочего места — по бланкам, часы — по записям
+        одного бланка. Потомки до уровня бланков кэшируются по (узел, период).
+
+        Args:
+            level: Уровень узла (enterprise, workshop, sector, workplace, blank)
+            node_id: Идентификатор узла (для enterprise — None)
+
+        Returns:
+            list[dict]: Потомки узла; пустой список для узла вне области
+                пользователя
+        """
+        if level == 'blank':
+            return self._drilldown_hours(node_id, workshop, sector)
+
+        return AnalyticsCache.get_range(
+            'drilldown',
+            f'{level}:{node_id}',
+            date_from,
+            date_to,
+            workshop,
+            sector,
+            lambda: self._drilldown_children(
+                level, node_id, date_from, date_to, workshop, sector
+            ),
+        )
+
+    def _drilldown_children(self, level, node_id, date_from, date_to, workshop, sector):
+        """Потомки узла до уровня бланков (один запрос)"""
+        child_level, node_field, group_fields = self.DRILLDOWN_LEVELS[level]
+
+        if child_level == 'blank':
+            return self._drilldown_blanks(node_id, date_from, date_to, workshop, sector)
+
+        rows = self._rollups(ProductionRollup, date_from, date_to, workshop, sector)
+        if node_field:
+            rows = rows.filter(**{node_field: node_id})
+
+        id_field, name_field = group_fields
+        rows = rows.values(id_field, name_field).annotate(
+            total_plan=Sum('total_plan'),
+            total_fact=Sum('total_fact'),
+            total_deviation=Sum('total_deviation'),
+            total_downtime=Sum('total_downtime'),
+            deviations_count=Sum('deviations_count'),
+            blanks_count=Count('id'),
+        ).order_by(name_field)
+
+        return [
+            {
+                'level': child_level,
+                'id': row[id_field],
+                'name': row[name_field],
+                'total_plan': row['total_plan'],
+                'total_fact': row['total_fact'],
+                'total_deviation': row['total_deviation'],
+                'total_downtime': row['total_downtime'],
+                'completion': self._completion(row['total_plan'], row['total_fact']),
+                'deviations_count': row['deviations_count'],
+                'blanks_count': row['blanks_count'],
+            }
+            for row in rows
+        ]
+
+    def _drilldown_blanks(self, workplace_id, date_from, date_to, workshop, sector):
+        """Бланки рабочего места за период (один запрос)"""
+        blanks = PABlank.objects.filter(
+            workplace_id=workplace_id,
+            date__gte=date_from,
+            date__lte=date_to,
+        )
+
+        if sector:
+            blanks = blanks.filter(workplace__sector=sector)
+        elif workshop:
+            blanks = blanks.filter(workplace__sector__workshop=workshop)
+
+        rows = blanks.values(
+            'pk',
+            'date',
+            'status',
+            'shift__name',
+            'product__name',
+            'total_plan',
+            'total_fact',
+            'total_deviation',
+            'total_downtime',
+        ).annotate(
+            deviations_count=Count('records__deviations'),
+        ).order_by('date', 'shift__number')
+
+        return [
+            {
+                'level': 'blank',
+                'id': row['pk'],
+                'name': f"{row['date']:%d.%m.%Y} {row['shift__name']}",
+                'date': row['date'].isoformat(),
+                'shift_name': row['shift__name'],
+                'product_name': row['product__name'],
+                'status': row['status'],
+                'total_plan': row['total_plan'],
+                'total_fact': row['total_fact'],
+                'total_deviation': row['total_deviation'],
+                'total_downtime': row['total_downtime'],
+                'completion': self._completion(row['total_plan'], row['total_fact']),
+                'deviations_count': row['deviations_count'],
+            }
+            for row in rows
+        ]
+
+    def _drilldown_hours(self, blank_id, workshop, sector):
+        """
+        Часовые записи одного бланка (один запрос, без кэша).
+
+        Единственный уровень, читающий записи ПА: к нему переходят только
+        от конкретного бланка.
+        """
+        records = PARecord.objects.filter(blank_id=blank_id)
+
+        if sector:
+            records = records.filter(blank__workplace__sector=sector)
+        elif workshop:
+            records = records.filter(blank__workplace__sector__workshop=workshop)
+
+        rows = records.values(
+            'pk',
+            'hour_number',
+            'start_time',
+            'end_time',
+            'is_filled',
+            'planned_quantity',
+            'actual_quantity',
+            'deviation',
+            'cumulative_deviation',
+            'downtime_minutes',
+        ).annotate(
+            deviations_count=Count('deviations'),
+        ).order_by('hour_number')
+
+        return [
+            {
+                'level': 'hour',
+                'id': row['pk'],
+                'name': f"{row['start_time']:%H:%M}–{row['end_time']:%H:%M}",
+                'hour_number': row['hour_number'],
+                'is_filled': row['is_filled'],
+                'total_plan': row['planned_quantity'],
+                'total_fact': row['actual_quantity'],
+                'total_deviation': row['deviation'],
+                'cumulative_deviation': row['cumulative_deviation'],
+                'total_downtime': row['downtime_minutes'],
+                'completion': self._completion(row['planned_quantity'], row['actual_quantity']),
+                'deviations_count': row['deviations_count'],
+            }
+            for row in rows
+        ]
+
+
+class AnalyticsCache:
+    """
+    Кэш дневных частичных итогов аналитики.
+
+    Ключ — метод, область (участок, цех или всё предприятие) и день.
+    Дни, в которых все бланки закрыты, кэшируются на CLOSED_TIMEOUT секунд:
+    их итоги меняются только при редактировании прошедшего бланка, и тогда
+    RollupService сбрасывает ключи этого дня. Срок ограничивает устаревание,
+    если сброс не дошёл до кэша. Сегодняшний день и дни с открытыми
+    бланками всегда читаются из итоговых таблиц. Полная перестройка итогов
+    сбрасывает кэш сменой поколения.
+
+    Итоги за произвольный период (drill-down, Парето) кэшируются по (узел, период)
+    и сбрасываются все сразу сменой ревизии при любом изменении прошедшего
+    дня; периоды, включающие сегодня, живут LIVE_TIMEOUT секунд, прошедшие —
+    CLOSED_TIMEOUT.
+
+    Кэш общий для всех воркеров (CACHES в настройках — Redis), поэтому
+    сброс после редактирования сразу виден во всех процессах.
+    """
+
+    GENERATION_KEY = 'shift_report:analytics:generation'
+    RANGE_REVISION_KEY = 'shift_report:analytics:range_revision'
+    KEY_PREFIX = 'shift_report:analytics:'
+
+    METHODS = ('dashboard', 'comparison', 'hourly')
+
+    LIVE_TIMEOUT = 60
+    CLOSED_TIMEOUT = 24 * 60 * 60
+
+    @classmethod
+    def get_days(cls, method, date_from, date_to, workshop, sector, fetch) -> dict:
+        """
+        Частичные итоги по дням периода.
+
+        Args:
+            method: Имя кэшируемого расчёта
+            fetch: Расчёт недостающих дней: fetch(days, workshop, sector)
+                возвращает {дата: частичный итог с флагом open}
+
+        Returns:
+            dict: {дата: частичный итог}
+        """
+        generation = cache.get(cls.GENERATION_KEY, 0)
+        scope = cls.scope_key(workshop, sector)
+
+        keys = {}
+        day = date_from
+        while day <= date_to:
+            keys[day] = cls._key(generation, method, scope, day)
+            day += timedelta(days=1)
+
+        cached = cache.get_many(keys.values())
+        days = {day: cached[key] for day, key in keys.items() if key in cached}
+
+        missing = [day for day in keys if day not in days]
+        if missing:
+            today = timezone.localdate()
+            fetched = fetch(missing, workshop, sector)
+            days.update(fetched)
+
+            cache.set_many({
+                keys[day]: partial
+                for day, partial in fetched.items()
+                if day < today and not partial['open']
+            }, cls.CLOSED_TIMEOUT)
+
+        return days
+
+    @classmethod
+    def get_range(cls, method, node, date_from, date_to, workshop, sector, fetch):
+        """
+        Итог по узлу за период.
+
+        Args:
+            method: Имя кэшируемого расчёта
+            node: Ключ узла
+            fetch: Расчёт итога без аргументов
+        """
+        versions = cache.get_many([cls.GENERATION_KEY, cls.RANGE_REVISION_KEY])
+        key = (
+            f'{cls.KEY_PREFIX}{versions.get(cls.GENERATION_KEY, 0)}:{method}:'
+            f'{versions.get(cls.RANGE_REVISION_KEY, 0)}:'
+            f'{cls.scope_key(workshop, sector)}:{node}:'
+            f'{date_from.isoformat()}:{date_to.isoformat()}'
+        )
+
+        result = cache.get(key)
+        if result is None:
+            result = fetch()
+            live = date_to >= timezone.localdate()
+            cache.set(key, result, cls.LIVE_TIMEOUT if live else cls.CLOSED_TIMEOUT)
+
+        return result
+
+    @classmethod
+    def invalidate_days(cls, days, workplace_ids) -> None:
+        """
+        Сброс закэшированных прошедших дней после изменения бланков.
+
+        Args:
+            days: Даты изменённых бланков
+            workplace_ids: Рабочие места изменённых бланков
+        """
+        today = timezone.localdate()
+        days = [day for day in days if day < today]
+        if not days:
+            return
+
+        scopes = {cls.scope_key()}
+        for sector_id, workshop_id in Workplace.objects.filter(
+            pk__in=workplace_ids,
+        ).values_list('sector_id', 'sector__workshop_id'):
+            scopes.add(f'sector:{sector_id}')
+            scopes.add(f'workshop:{workshop_id}')
+
+        generation = cache.get(cls.GENERATION_KEY, 0)
+        cache.delete_many([
+            cls._key(generation, method, scope, day)
+            for method in cls.METHODS
+            for scope in scopes
+            for day in days
+        ])
+
+        try:
+            cache.incr(cls.RANGE_REVISION_KEY)
+        except ValueError:
+            cache.add(cls.RANGE_REVISION_KEY, 1, None)
+
+    @classmethod
+    def invalidate_all(cls) -> None:
+        """Новое поколение кэша (после полной перестройки итогов)"""
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            cache.add(cls.GENERATION_KEY, 1, None)
+
+    @staticmethod
+    def scope_key(workshop=None, sector=None) -> str:
+        """Ключ области аналитики"""
+        if sector:
+            return f'sector:{sector.pk}'
+        if workshop:
+            return f'workshop:{workshop.pk}'
+        return 'all'
+
+    @classmethod
+    def _key(cls, generation, method, scope, day) -> str:
+        return f'{cls.KEY_PREFIX}{generation}:{method}:{scope}:{day.isoformat()}'
@@ -268,25 +268,15 @@ class BlankGeneratorService:
         """
         Пересчёт всех накопительных показателей бланка.
 
-        Вызывается после обновления записей.
+        Вызывается после обновления записей. Строка бланка блокируется
+        до конца транзакции, чтобы пересчёт не перемешался с вводом оператора.
         """
-        records = blank.records.order_by('hour_number')
+        with transaction.atomic():
+            PABlank.lock(blank.pk)
 
-        cumulative_plan = 0
-        cumulative_fact = 0
-
-        for record in records:
-            cumulative_plan += record.planned_quantity
-            cumulative_fact += record.actual_quantity
-
-            record.cumulative_plan = cumulative_plan
-            record.cumulative_fact = cumulative_fact
-            record.cumulative_deviation = cumulative_fact - cumulative_plan
-            record.deviation = record.actual_quantity - record.planned_quantity
-            record.save(update_fields=[
-                'cumulative_plan', 'cumulative_fact',
-                'cumulative_deviation', 'deviation', 'updated_at'
-            ])
-
-        # Обновляем итоги бланка
-        blank.recalculate_totals()
+            # Накопительные показатели всех часов одним UPDATE
+            PARecord.recalculate_cumulative([blank.pk])
+
+            # Обновляем итоги бланка
+            blank.refresh_from_db(fields=['version'])
+            blank.recalculate_totals()
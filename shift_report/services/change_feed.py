@@ -0,0 +1,225 @@
+"""
+Лента изменений бланков для push-обновления панели мониторинга.
+
+FR-020: Карточки рабочих мест с real-time статусом
+
+Путь записи публикует событие с новыми итогами бланка после фиксации
+транзакции. На PostgreSQL событие отправляется через NOTIFY и доходит
+до всех процессов приложения (каждый процесс держит одно соединение
+с LISTEN). На других СУБД используется брокер внутри процесса.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from shift_report.services.monitoring import MonitoringSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Подписка одного SSE-потока на события ленты"""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        broker.add(self)
+
+    def put(self, event: dict):
+        """Передача события в цикл событий подписчика (из любого потока)"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self, timeout: float):
+        """
+        Ожидание следующего события.
+
+        Returns:
+            dict | None: Событие или None, если за timeout событий не было
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._broker.remove(self)
+
+
+class _Broker:
+    """Раздача событий подписчикам текущего процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def add(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+    def remove(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт
+                self.remove(subscription)
+
+
+class BlankChangeFeed:
+    """
+    Лента изменений итогов бланков.
+
+    Основные функции:
+    - Публикация итогов бланка из пути записи
+    - Подписка SSE-потоков на изменения
+    """
+
+    CHANNEL = 'shift_report_blanks'
+
+    # Пауза перед повторным подключением слушателя, сек
+    RECONNECT_SECONDS = 5
+
+    _broker = _Broker()
+    _listener = None
+    _listener_lock = threading.Lock()
+
+    @classmethod
+    def publish(cls, blank, changed=()):
+        """
+        Публикация текущих итогов бланка.
+
+        Вызывается внутри транзакции записи: событие уходит подписчикам
+        только после её фиксации.
+
+        Args:
+            blank: Бланк с актуальными итогами (после apply_totals_delta)
+            changed: Записи, изменённые PARecord.recalculate_cumulative
+        """
+        cls.publish_many([blank], changed)
+
+    @classmethod
+    def publish_many(cls, blanks, changed=()):
+        """Публикация итогов нескольких бланков"""
+        events = [cls._event(blank, changed) for blank in blanks]
+
+        if not events:
+            return
+
+        # Снимки табло устаревают вместе с итогами
+        transaction.on_commit(MonitoringSnapshot.invalidate)
+
+        if connection.vendor == 'postgresql':
+            # NOTIFY внутри транзакции доставляется при COMMIT
+            with connection.cursor() as cursor:
+                for event in events:
+                    cursor.execute(
+                        'SELECT pg_notify(%s, %s)',
+                        [cls.CHANNEL, json.dumps(event)],
+                    )
+            return
+
+        transaction.on_commit(
+            lambda: [cls._broker.dispatch(event) for event in events]
+        )
+
+    @classmethod
+    def subscribe(cls) -> Subscription:
+        """
+        Подписка на события (вызывается из асинхронного кода).
+
+        Returns:
+            Subscription: Подписка; по завершении потока вызвать close()
+        """
+        if connection.vendor == 'postgresql':
+            cls._ensure_listener()
+
+        return Subscription(cls._broker)
+
+    @classmethod
+    def _event(cls, blank, changed=()) -> dict:
+        """
+        Содержимое события: итоги и статус бланка.
+
+        Для открытого сегодняшнего бланка процент выполнения за прошедшие
+        часы берётся из изменённых пересчётом записей — накопительные
+        показатели последнего завершившегося часа. Если завершившиеся часы
+        не изменились, не изменился и процент: он не входит в событие.
+        """
+        event = {
+            'id': blank.pk,
+            'workplace_id': blank.workplace_id,
+            'date': blank.date.isoformat(),
+            'total_plan': blank.total_plan,
+            'total_fact': blank.total_fact,
+            'total_deviation': blank.total_deviation,
+            'status': blank.status,
+        }
+
+        if not blank.is_editable or blank.date != timezone.localdate():
+            event['completion'] = float(blank.completion_percentage)
+            return event
+
+        elapsed = [
+            row for row in changed
+            if row['blank_id'] == blank.pk and row['is_elapsed']
+        ]
+        if elapsed:
+            last = max(elapsed, key=lambda row: row['hour_number'])
+            plan = last['cumulative_plan']
+            event['completion'] = (
+                round(last['cumulative_fact'] / plan * 100, 2) if plan > 0 else 0.0
+            )
+
+        return event
+
+    @classmethod
+    def _ensure_listener(cls):
+        """Запуск потока LISTEN (один на процесс)"""
+        with cls._listener_lock:
+            if cls._listener is None or not cls._listener.is_alive():
+                cls._listener = threading.Thread(
+                    target=cls._listen,
+                    name='blank-change-feed',
+                    daemon=True,
+                )
+                cls._listener.start()
+
+    @classmethod
+    def _listen(cls):
+        """Приём NOTIFY из PostgreSQL и раздача подписчикам процесса"""
+        while True:
+            wrapper = connections.create_connection('default')
+            try:
+                wrapper.connect()
+                raw = wrapper.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f'LISTEN {cls.CHANNEL}')
+
+                while True:
+                    if select.select([raw], [], [], 60) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        notify = raw.notifies.pop(0)
+                        cls._broker.dispatch(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Слушатель ленты изменений бланков остановлен')
+            finally:
+                wrapper.close()
+
+            time.sleep(cls.RECONNECT_SECONDS)
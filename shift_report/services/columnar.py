@@ -0,0 +1,89 @@
+"""
+Компактный колоночный формат ответов API мониторинга.
+
+Списки словарей с повторяющимися ключами заменяются заголовком и массивом
+значений на каждое поле. Повторяющиеся строки (названия рабочих мест,
+продукции) кодируются номерами словаря, который хранится в сессии:
+клиент получает только новые записи словаря.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ColumnarPayload:
+    """
+    Колоночное представление строк с сессионным словарём строк.
+
+    Клиент передаёт known — количество уже известных ему записей словаря.
+    В ответ уходят записи начиная с этого номера; если клиент знает
+    больше, чем есть в сессии (сессия сменилась), словарь передаётся
+    целиком с offset = 0.
+    """
+
+    SESSION_KEY = 'shift_report_columnar_dictionary'
+
+    def __init__(self, session, known: int = 0):
+        self._session = session
+        self._entries = list(session.get(self.SESSION_KEY, []))
+        self._codes = {value: code for code, value in enumerate(self._entries)}
+        self._known = known if 0 <= known <= len(self._entries) else 0
+
+    def columns(self, rows: list[dict], fields: list[str], encoded=()) -> dict:
+        """
+        Заголовок и массивы значений по полям.
+
+        Args:
+            rows: Строки (словари)
+            fields: Поля в порядке заголовка
+            encoded: Поля, значения которых кодируются словарём
+        """
+        return {
+            'columns': list(fields),
+            'values': [
+                [self._code(row[field]) if field in encoded else row[field] for row in rows]
+                for field in fields
+            ],
+        }
+
+    def dictionary(self) -> dict:
+        """Новые для клиента записи словаря (сохраняет словарь в сессии)"""
+        if len(self._entries) != len(self._session.get(self.SESSION_KEY, [])):
+            self._session[self.SESSION_KEY] = self._entries
+
+        return {
+            'offset': self._known,
+            'entries': self._entries[self._known:],
+        }
+
+    def _code(self, value) -> int:
+        if value not in self._codes:
+            self._codes[value] = len(self._entries)
+            self._entries.append(value)
+        return self._codes[value]
+
+
+def compact_json_response(data) -> HttpResponse:
+    """
+    JSON-ответ без пробелов и с UTF-8 вместо \\u-экранирования.
+
+    Использует orjson, если он установлен.
+    """
+    if orjson is not None:
+        body = orjson.dumps(data, default=DjangoJSONEncoder().default)
+    else:
+        body = json.dumps(
+            data,
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+            separators=(',', ':'),
+        )
+
+    return HttpResponse(body, content_type='application/json')
@@ -15,6 +15,7 @@ from django.db import transaction
 from shift_report.models import (DeviationEntry, DeviationGroup,
                                  DeviationReason, Employee, PABlank, Product,
                                  Sector, Shift, Workplace, Workshop)
+from shift_report.services.reason_catalog import ReasonCatalog
 
 
 class ImportExportService:
@@ -69,6 +70,9 @@ class ImportExportService:
         except Exception as e:
             errors.append(f'Ошибка чтения CSV: {str(e)}')
 
+        if model_class in (DeviationGroup, DeviationReason):
+            ReasonCatalog.invalidate()
+
         return {
             'created': created,
             'updated': updated,
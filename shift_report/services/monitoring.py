@@ -0,0 +1,437 @@
+"""
+Сервис данных панели мониторинга мастера.
+
+FR-019: Панель мониторинга для мастеров
+FR-020: Карточки рабочих мест с real-time статусом
+"""
+
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from shift_report.models import DeviationEntry, PABlank, PARecord
+
+
+class MonitoringService:
+    """
+    Сервис для построения карточек рабочих мест.
+
+    Карточка — проекция бланка: только поля, которые выводятся на панели,
+    и план/факт за завершившиеся часы. Все карточки строятся одним
+    запросом без загрузки почасовых записей; прогноз к концу смены —
+    ещё одним запросом на все карточки.
+    """
+
+    # Последние заполненные часы, по которым оценивается темп
+    RUN_RATE_HOURS = 3
+
+    CARD_FIELDS = (
+        'id',
+        'workplace_id',
+        'workplace__name',
+        'workplace__sector_id',
+        'workplace__sector__name',
+        'product__name',
+        'product__article',
+        'shift__name',
+        'status',
+        'total_plan',
+        'total_fact',
+        'total_deviation',
+        'elapsed_plan',
+        'elapsed_fact',
+    )
+
+    def get_scope_blanks(self, user, day: date):
+        """
+        Открытые бланки дня в пределах участка или цеха пользователя.
+
+        Args:
+            user: Сотрудник
+            day: Дата
+        """
+        blanks = PABlank.objects.filter(
+            date=day,
+            status__in=['draft', 'active'],
+        )
+
+        if user.sector:
+            blanks = blanks.filter(workplace__sector=user.sector)
+        elif user.workshop:
+            blanks = blanks.filter(workplace__sector__workshop=user.workshop)
+
+        return blanks
+
+    def get_cards(self, blanks, now: datetime = None) -> list[dict[str, Any]]:
+        """
+        Карточки рабочих мест одним запросом.
+
+        Args:
+            blanks: QuerySet бланков
+            now: Момент расчёта процента (по умолчанию — текущее время)
+
+        Returns:
+            list: Карточки по участкам; внутри участка — по риску
+                невыполнения плана (худший прогноз первым)
+        """
+        rows = list(blanks.with_progress(now).order_by(
+            'workplace__sector__number', 'workplace__number'
+        ).values(*self.CARD_FIELDS))
+
+        projections = PARecord.project_completion(
+            [row['id'] for row in rows], self.RUN_RATE_HOURS
+        )
+        cards = [self._card(row, projections.get(row['id'])) for row in rows]
+
+        sector_order = {}
+        for card in cards:
+            sector_order.setdefault(card['sector_id'], len(sector_order))
+
+        return sorted(cards, key=lambda card: (
+            sector_order[card['sector_id']],
+            *self.risk(card['projected_completion']),
+        ))
+
+    def get_board(self, user, day: date) -> dict[str, Any]:
+        """
+        Данные панели мониторинга: карточки по участкам, итоги, топ отклонений.
+
+        Args:
+            user: Сотрудник (определяет участок или цех)
+            day: Дата
+
+        Returns:
+            dict: Контекст шаблона доски
+        """
+        cards = self.get_cards(self.get_scope_blanks(user, day))
+
+        # Группируем по участкам
+        sectors_data = {}
+        total_plan = 0
+        total_fact = 0
+        total_deviation = 0
+
+        for card in cards:
+            sector_id = card['sector_id']
+            if sector_id not in sectors_data:
+                sectors_data[sector_id] = {
+                    'sector': {'id': sector_id, 'name': card['sector_name']},
+                    'blanks': [],
+                    'total_plan': 0,
+                    'total_fact': 0,
+                    'total_deviation': 0,
+                }
+            sectors_data[sector_id]['blanks'].append(card)
+            sectors_data[sector_id]['total_plan'] += card['total_plan'] or 0
+            sectors_data[sector_id]['total_fact'] += card['total_fact'] or 0
+            sectors_data[sector_id]['total_deviation'] += card['total_deviation'] or 0
+
+            # Суммируем общие итоги
+            total_plan += card['total_plan'] or 0
+            total_fact += card['total_fact'] or 0
+            total_deviation += card['total_deviation'] or 0
+
+        # Рассчитываем процент выполнения для каждого участка
+        for data in sectors_data.values():
+            if data['total_plan'] > 0:
+                data['completion'] = round(data['total_fact'] / data['total_plan'] * 100, 1)
+            else:
+                data['completion'] = 0
+
+        return {
+            'sectors_data': sectors_data,
+            'total_plan': total_plan,
+            'total_fact': total_fact,
+            'total_deviation': total_deviation,
+            'deviations_stats': self.get_deviations_stats(user, day),
+            'cards_count': len(cards),
+        }
+
+    def get_workshop_overview(self, user, day: date) -> dict[str, Any]:
+        """
+        Обзор цеха: только агрегаты по участкам, без карточек.
+
+        Плитки участков строятся одним запросом по бланкам с планом
+        и фактом за завершившиеся часы (with_progress): отстающим
+        считается бланк, у которого факт за прошедшие часы меньше плана
+        за те же часы. Карточки участка загружаются отдельно
+        (get_sector_cards) при раскрытии.
+
+        Args:
+            user: Сотрудник (начальник цеха)
+            day: Дата
+
+        Returns:
+            dict: Контекст шаблона доски (blanks участков — None)
+        """
+        rows = self.get_scope_blanks(user, day).with_progress().order_by(
+            'workplace__sector__number'
+        ).values(
+            'workplace__sector_id',
+            'workplace__sector__name',
+            'total_plan',
+            'total_fact',
+            'total_deviation',
+            'elapsed_plan',
+            'elapsed_fact',
+        )
+
+        sectors_data = {}
+        for row in rows:
+            sector_id = row['workplace__sector_id']
+            if sector_id not in sectors_data:
+                sectors_data[sector_id] = {
+                    'sector': {
+                        'id': sector_id,
+                        'name': row['workplace__sector__name'],
+                    },
+                    'blanks': None,
+                    'blanks_count': 0,
+                    'behind_count': 0,
+                    'total_plan': 0,
+                    'total_fact': 0,
+                    'total_deviation': 0,
+                }
+
+            tile = sectors_data[sector_id]
+            tile['blanks_count'] += 1
+            if (row['elapsed_fact'] or 0) < (row['elapsed_plan'] or 0):
+                tile['behind_count'] += 1
+            tile['total_plan'] += row['total_plan']
+            tile['total_fact'] += row['total_fact']
+            tile['total_deviation'] += row['total_deviation']
+
+        for tile in sectors_data.values():
+            plan = tile['total_plan']
+            tile['completion'] = round(tile['total_fact'] / plan * 100, 1) if plan > 0 else 0
+
+        tiles = sectors_data.values()
+
+        return {
+            'sectors_data': sectors_data,
+            'total_plan': sum(tile['total_plan'] for tile in tiles),
+            'total_fact': sum(tile['total_fact'] for tile in tiles),
+            'total_deviation': sum(tile['total_deviation'] for tile in tiles),
+            'deviations_stats': self.get_deviations_stats(user, day),
+            'cards_count': 0,
+        }
+
+    def get_sector_cards(self, user, day: date, sector_id: int) -> list[dict[str, Any]]:
+        """Карточки одного участка в пределах области пользователя"""
+        return self.get_cards(
+            self.get_scope_blanks(user, day).filter(workplace__sector_id=sector_id)
+        )
+
+    def get_deviations_stats(self, user, day: date) -> list[dict[str, Any]]:
+        """Топ-5 групп причин отклонений за день в области пользователя"""
+        deviations_today = DeviationEntry.objects.filter(
+            record__blank__date=day,
+        )
+        if user.sector:
+            deviations_today = deviations_today.filter(
+                record__blank__workplace__sector=user.sector
+            )
+        elif user.workshop:
+            deviations_today = deviations_today.filter(
+                record__blank__workplace__sector__workshop=user.workshop
+            )
+
+        return list(deviations_today.values(
+            'reason__group__name',
+            'reason__group__color',
+        ).annotate(
+            count=Count('id'),
+            total_duration=Sum('duration_minutes'),
+        ).order_by('-count')[:5])
+
+    @staticmethod
+    def group_deviations(records) -> dict[str, dict[str, Any]]:
+        """
+        Сводка причин отклонений бланка по группам.
+
+        Строится из записей с уже загруженными deviations__reason__group,
+        без отдельного запроса.
+
+        Args:
+            records: Почасовые записи бланка (с prefetch причин)
+
+        Returns:
+            dict: {название группы: {'color', 'count', 'duration'}}
+                по убыванию количества
+        """
+        groups = {}
+        for record in records:
+            for dev in record.deviations.all():
+                group = dev.reason.group
+                stats = groups.setdefault(group.name, {
+                    'color': group.color,
+                    'count': 0,
+                    'duration': 0,
+                })
+                stats['count'] += 1
+                stats['duration'] += dev.duration_minutes or 0
+
+        return dict(sorted(groups.items(), key=lambda item: -item[1]['count']))
+
+    def get_deviation_groups(self, blank_id: int) -> dict[str, dict[str, Any]]:
+        """Та же сводка одним агрегирующим запросом (для обновления страницы)"""
+        rows = DeviationEntry.objects.filter(
+            record__blank_id=blank_id,
+        ).values(
+            'reason__group__name',
+            'reason__group__color',
+        ).annotate(
+            count=Count('id'),
+            duration=Sum('duration_minutes'),
+        ).order_by('-count', 'reason__group__name')
+
+        return {
+            row['reason__group__name']: {
+                'color': row['reason__group__color'],
+                'count': row['count'],
+                'duration': row['duration'] or 0,
+            }
+            for row in rows
+        }
+
+    def _card(self, row: dict, projection: dict = None) -> dict[str, Any]:
+        """Карточка из строки проекции и прогноза"""
+        completion = self.completion(row['elapsed_plan'], row['elapsed_fact'])
+        projected = (projection or {}).get('projected_completion')
+
+        return {
+            'id': row['id'],
+            'workplace_id': row['workplace_id'],
+            'workplace_name': row['workplace__name'],
+            'sector_id': row['workplace__sector_id'],
+            'sector_name': row['workplace__sector__name'],
+            'product_name': row['product__name'],
+            'product_article': row['product__article'],
+            'shift_name': row['shift__name'],
+            'status': row['status'],
+            'total_plan': row['total_plan'],
+            'total_fact': row['total_fact'],
+            'total_deviation': row['total_deviation'],
+            'completion': completion,
+            'color': self.color(completion),
+            'projected_completion': projected,
+            'projected_color': self.projected_color(projected),
+        }
+
+    @staticmethod
+    def completion(plan, fact) -> Decimal:
+        """Процент выполнения за завершившиеся часы (как PABlank.current_completion_percentage)"""
+        if not plan:
+            return Decimal('0.00')
+
+        return round(Decimal(fact or 0) / Decimal(plan) * 100, 2)
+
+    @staticmethod
+    def risk(projected_completion) -> tuple:
+        """Ключ сортировки по риску: меньший прогноз раньше, без прогноза — в конце"""
+        if projected_completion is None:
+            return (1, 0)
+        return (0, projected_completion)
+
+    @classmethod
+    def projected_color(cls, projected_completion) -> str:
+        """Цвет прогноза; нулевой прогноз — красный, без прогноза — серый"""
+        if projected_completion is None:
+            return 'secondary'
+        return cls.color(projected_completion) if projected_completion > 0 else 'danger'
+
+    @staticmethod
+    def color(completion: Decimal) -> str:
+        """Цвет карточки (BR-004); серый — часы ещё не начались или не заполнены"""
+        if completion >= 100:
+            return 'success'
+        elif completion >= 90:
+            return 'warning'
+        elif completion > 0:
+            return 'danger'
+        return 'secondary'
+
+
+class MonitoringSnapshot:
+    """
+    Общий снимок доски мониторинга для режима табло.
+
+    Снимок хранится в общем кэше (CACHES — Redis) по области (участок,
+    цех или всё предприятие), а не по пользователю: десятки экранов одной
+    области на всех воркерах получают одну и ту же разметку, а смена
+    поколения видна всем процессам сразу. Любое изменение итогов бланка
+    увеличивает поколение; устаревший снимок пересчитывается одним
+    запросом области не чаще раза в REFRESH_SECONDS, остальные экраны
+    в это время получают предыдущий снимок.
+    """
+
+    GENERATION_KEY = 'shift_report:monitoring:generation'
+    KEY_PREFIX = 'shift_report:monitoring:snapshot:'
+
+    # Не чаще одного пересчёта на область за интервал, сек
+    REFRESH_SECONDS = 30
+
+    # Без изменений снимок всё равно обновляется: процент зависит от времени
+    MAX_AGE_SECONDS = 120
+
+    template_name = 'shift_report/master/_monitoring_board.html'
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Новое поколение снимков (при изменении итогов любого бланка)"""
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            cache.add(cls.GENERATION_KEY, 1, None)
+
+    @classmethod
+    def scope_key(cls, user) -> str:
+        """Ключ области мониторинга пользователя"""
+        if user.sector_id:
+            return f'sector:{user.sector_id}'
+        if user.workshop_id:
+            return f'workshop:{user.workshop_id}'
+        return 'all'
+
+    @classmethod
+    def get_html(cls, user) -> str:
+        """
+        Разметка доски для области пользователя.
+
+        Returns:
+            str: HTML доски (без персональных данных и CSRF-токена)
+        """
+        key = cls.KEY_PREFIX + cls.scope_key(user)
+        generation = cache.get(cls.GENERATION_KEY, 0)
+        snapshot = cache.get(key)
+
+        if snapshot is not None:
+            age = time.time() - snapshot['built_at']
+            current = snapshot['generation'] == generation and age < cls.MAX_AGE_SECONDS
+            if current or age < cls.REFRESH_SECONDS:
+                return snapshot['html']
+
+            # Пересчитывает один запрос, остальные получают прежний снимок
+            if not cache.add(key + ':lock', 1, cls.REFRESH_SECONDS):
+                return snapshot['html']
+
+        today = timezone.localdate()
+        html = render_to_string(cls.template_name, {
+            **MonitoringService().get_board(user, today),
+            'today': today,
+        })
+
+        cache.set(key, {
+            'html': html,
+            'generation': generation,
+            'built_at': time.time(),
+        }, cls.MAX_AGE_SECONDS * 2)
+        cache.delete(key + ':lock')
+
+        return html
@@ -0,0 +1,109 @@
+"""
+Кэш справочника причин отклонений.
+
+FR-016: Выбор причины отклонения
+
+Справочник меняется несколько раз в месяц, а читается тысячи раз за смену
+(страница ввода данных, автокомплит). Поэтому он хранится в памяти процесса
+и перечитывается из БД только при смене версии или по истечении TTL.
+"""
+
+import threading
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from shift_report.models import DeviationReason
+
+
+class ReasonCatalog:
+    """
+    Версионируемый in-process кэш активных причин отклонений.
+
+    Версия хранится в кэше Django: при общем бэкенде кэша (Redis, Memcached)
+    сброс виден всем воркерам, при локальном — текущему процессу.
+    TTL ограничивает устаревание топа частых причин, так как счётчики
+    использования меняются без сброса версии.
+    """
+
+    VERSION_KEY = 'shift_report:reason_catalog:version'
+    TTL_SECONDS = 300
+
+    _lock = threading.Lock()
+    _version = None
+    _loaded_at = 0.0
+    _reasons = []
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Сброс кэша (при изменении причины или группы)"""
+        cache.set(cls.VERSION_KEY, uuid4().hex, None)
+        with cls._lock:
+            cls._version = None
+
+    @classmethod
+    def get_reasons(cls) -> list[dict]:
+        """
+        Все активные причины с названием и цветом группы.
+
+        Returns:
+            list[dict]: Причины в порядке справочника (группа, порядок, название)
+        """
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            version = uuid4().hex
+            cache.add(cls.VERSION_KEY, version, None)
+            version = cache.get(cls.VERSION_KEY, version)
+
+        with cls._lock:
+            expired = time.monotonic() - cls._loaded_at > cls.TTL_SECONDS
+            if cls._version != version or expired:
+                cls._reasons = cls._load()
+                cls._version = version
+                cls._loaded_at = time.monotonic()
+            return cls._reasons
+
+    @classmethod
+    def get_top(cls, limit: int = 5) -> list[dict]:
+        """Самые часто используемые причины"""
+        return sorted(
+            cls.get_reasons(),
+            key=lambda r: (-r['usage_count'], r['name']),
+        )[:limit]
+
+    @classmethod
+    def search(cls, query: str = '', limit: int = 20) -> list[dict]:
+        """
+        Поиск причин по названию, коду и группе (без обращения к БД).
+
+        Args:
+            query: Строка поиска
+            limit: Максимальное количество результатов
+        """
+        needle = query.strip().lower()
+        reasons = [
+            r for r in cls.get_reasons()
+            if not needle or needle in r['search_text']
+        ]
+        return sorted(reasons, key=lambda r: (-r['usage_count'], r['name']))[:limit]
+
+    @classmethod
+    def _load(cls) -> list[dict]:
+        """Загрузка справочника из БД одним запросом"""
+        reasons = DeviationReason.objects.filter(
+            is_active=True
+        ).select_related('group').order_by('group__order', 'order', 'name')
+
+        return [
+            {
+                'id': r.pk,
+                'name': r.name,
+                'code': r.code,
+                'group': r.group.name,
+                'group_color': r.group.color,
+                'usage_count': r.usage_count,
+                'search_text': f'{r.name} {r.code} {r.group.name}'.lower(),
+            }
+            for r in reasons
+        ]
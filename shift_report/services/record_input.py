@@ -0,0 +1,362 @@
+"""
+Сервис сохранения фактических данных оператором.
+
+FR-015: Интерфейс ввода данных оператором
+FR-016: Выбор причины отклонения
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from shift_report.models import (DeviationEntry, DeviationReason, PABlank,
+                                 PARecord, SyncOperation)
+from shift_report.services.alerts import AlertEngine
+from shift_report.services.change_feed import BlankChangeFeed
+from shift_report.services.rollups import RollupService
+
+
+class RecordInputService:
+    """
+    Сервис для записи фактических данных по часам.
+
+    Основные функции:
+    - Сохранение одного часа с причинами отклонения
+    - Пакетное сохранение нескольких часов одного бланка
+    - Идемпотентное применение офлайн-очереди планшета
+    - Пересчёт накопительных показателей и итогов бланка
+    - Проверка правил оповещений мастера
+    - Публикация новых итогов в ленту изменений
+    - Обновление дневных итогов аналитики
+    """
+
+    def save_record(
+        self,
+        record: PARecord,
+        actual_quantity: int,
+        deviations: list[dict],
+        user,
+    ) -> tuple[PARecord, list[dict]]:
+        """
+        Сохраняет факт за один час.
+
+        Args:
+            record: Почасовая запись
+            actual_quantity: Фактическое количество, шт
+            deviations: Причины отклонения
+                (словари с ключами reason_id, duration, comment);
+                None — причины не изменяются
+            user: Сотрудник, вносящий данные
+
+        Returns:
+            tuple: Обновлённая запись (с новыми накопительными показателями)
+                и записи, изменённые пересчётом
+                (результат PARecord.recalculate_cumulative)
+
+        Raises:
+            ValueError: Если бланк недоступен для редактирования
+        """
+        with transaction.atomic():
+            blank = self._lock_blank(record.blank)
+
+            # Старое значение читаем уже под блокировкой бланка
+            record.refresh_from_db(fields=['actual_quantity'])
+            old_actual_quantity = record.actual_quantity
+            self._fill_record(record, actual_quantity, user)
+            record.save()
+
+            # Обработка причин отклонения (если есть отклонение)
+            downtime = {}
+            if deviations is not None and record.deviation < 0:
+                downtime[record.pk] = self._process_deviations(record, deviations, user)
+
+            # Пересчитываем накопительные показатели всего бланка
+            changed = PARecord.recalculate_cumulative([blank.pk])
+            for row in changed:
+                if row['id'] == record.pk:
+                    record.cumulative_plan = row['cumulative_plan']
+                    record.cumulative_fact = row['cumulative_fact']
+                    record.cumulative_deviation = row['cumulative_deviation']
+
+            # Применяем изменение факта к итогам бланка
+            blank.apply_totals_delta(
+                fact=record.actual_quantity - old_actual_quantity
+            )
+
+            # Оповещения мастера по правилам
+            AlertEngine.check(blank, [record], downtime, changed)
+
+            # Новые итоги — подписчикам панели мониторинга и в итоги аналитики
+            BlankChangeFeed.publish(blank, changed)
+            RollupService.schedule([blank])
+
+        return record, changed
+
+    def save_batch(
+        self,
+        blank: PABlank,
+        entries: list[dict],
+        user,
+    ) -> list[PARecord]:
+        """
+        Пакетное сохранение нескольких часов одного бланка.
+
+        Все часы сохраняются в одной транзакции, после чего выполняется
+        один пересчёт накопительных показателей и одно обновление итогов.
+
+        Args:
+            blank: Бланк ПА
+            entries: Данные по часам
+                (словари с ключами record_id, actual_quantity, deviations)
+            user: Сотрудник, вносящий данные
+
+        Returns:
+            list[PARecord]: Обновлённые записи
+
+        Raises:
+            ValueError: Если запись не принадлежит бланку
+                или бланк недоступен для редактирования
+        """
+        record_ids = [entry['record_id'] for entry in entries]
+
+        with transaction.atomic():
+            blank = self._lock_blank(blank)
+            records = blank.records.in_bulk(record_ids)
+
+            missing = set(record_ids) - set(records)
+            if missing:
+                raise ValueError(
+                    f'Записи {sorted(missing)} не принадлежат бланку {blank.pk}'
+                )
+
+            fact_delta = 0
+            updated = []
+
+            for entry in entries:
+                record = records[entry['record_id']]
+                fact_delta -= record.actual_quantity
+                self._fill_record(record, entry['actual_quantity'], user)
+                fact_delta += record.actual_quantity
+                updated.append(record)
+
+            PARecord.objects.bulk_update(updated, [
+                'actual_quantity', 'deviation', 'is_filled',
+                'filled_at', 'filled_by', 'updated_at',
+            ])
+
+            downtime = {}
+            for entry in entries:
+                record = records[entry['record_id']]
+                if record.deviation < 0:
+                    downtime[record.pk] = self._process_deviations(
+                        record, entry.get('deviations', []), user
+                    )
+
+            changed = PARecord.recalculate_cumulative([blank.pk])
+            blank.apply_totals_delta(fact=fact_delta)
+            AlertEngine.check(blank, updated, downtime, changed)
+            BlankChangeFeed.publish(blank, changed)
+            RollupService.schedule([blank])
+
+        return updated
+
+    def apply_sync_operations(
+        self,
+        operations: list[dict],
+        user,
+        can_access=None,
+    ) -> dict[str, str]:
+        """
+        Применение очереди операций, накопленной планшетом без сети.
+
+        Уже применённые ключи (и повторы внутри очереди) пропускаются.
+        Остальные операции группируются по бланкам, каждая группа
+        применяется одним пакетом через save_batch вместе с фиксацией
+        ключей. Для одного часа выигрывает последняя операция очереди.
+
+        Args:
+            operations: Проверенные операции (словари с ключами key,
+                record_id, actual_quantity, deviations, created_at — datetime
+                или None)
+            user: Сотрудник, отправивший очередь
+            can_access: Проверка доступа к бланку (callable)
+
+        Returns:
+            dict[str, str]: Статус по каждому ключу:
+                applied, duplicate, rejected или retry
+        """
+        seen = set(SyncOperation.objects.filter(
+            idempotency_key__in=[op['key'] for op in operations]
+        ).values_list('idempotency_key', flat=True))
+
+        results = {}
+        pending = []
+        for op in operations:
+            if op['key'] in seen:
+                results.setdefault(op['key'], 'duplicate')
+                continue
+            seen.add(op['key'])
+            pending.append(op)
+
+        records = PARecord.objects.select_related(
+            'blank',
+            'blank__workplace',
+            'blank__workplace__sector',
+        ).in_bulk([op['record_id'] for op in pending])
+
+        by_blank = {}
+        for op in pending:
+            record = records.get(op['record_id'])
+            if (record is None or not record.blank.is_editable or
+                    (can_access and not can_access(record.blank))):
+                results[op['key']] = 'rejected'
+                continue
+            by_blank.setdefault(record.blank_id, (record.blank, []))[1].append(op)
+
+        for blank, ops in by_blank.values():
+            latest = {op['record_id']: op for op in ops}
+
+            try:
+                with transaction.atomic():
+                    claimed = self._claim_keys(ops, user)
+                    if claimed:
+                        self.save_batch(blank, list(latest.values()), user)
+            except ValueError:
+                # Бланк закрыт, пока операции ждали отправки
+                for op in ops:
+                    results[op['key']] = 'rejected'
+                continue
+
+            # Ключ занят — та же очередь доставлена параллельно, клиент повторит
+            for op in ops:
+                results[op['key']] = 'applied' if claimed else 'retry'
+
+        return results
+
+    def _claim_keys(self, ops: list[dict], user) -> bool:
+        """
+        Фиксация ключей идемпотентности операций.
+
+        Returns:
+            bool: False, если ключ уже зафиксирован параллельной отправкой
+        """
+        try:
+            with transaction.atomic():
+                SyncOperation.objects.bulk_create([
+                    SyncOperation(
+                        idempotency_key=op['key'],
+                        record_id=op['record_id'],
+                        employee=user,
+                        client_created_at=op.get('created_at'),
+                    )
+                    for op in ops
+                ])
+        except IntegrityError:
+            return False
+
+        return True
+
+    def _lock_blank(self, blank: PABlank) -> PABlank:
+        """
+        Блокировка строки бланка на время записи.
+
+        Параллельные записи в один бланк выполняются последовательно,
+        записи в разные бланки участка друг друга не ждут. Актуальные
+        итоги и версия переносятся в переданный экземпляр.
+        """
+        locked = PABlank.lock(blank.pk)
+
+        if not locked.is_editable:
+            raise ValueError('Бланк недоступен для редактирования')
+
+        for field in ('status', 'version', 'total_plan', 'total_fact',
+                      'total_deviation', 'total_downtime',
+                      'completion_percentage', 'updated_at'):
+            setattr(blank, field, getattr(locked, field))
+
+        return blank
+
+    def _fill_record(self, record: PARecord, actual_quantity: int, user):
+        """Заполнение фактических данных записи"""
+        now = timezone.now()
+
+        record.actual_quantity = actual_quantity
+        record.is_filled = True
+        record.filled_at = now
+        record.filled_by = user
+        record.updated_at = now
+
+        # Расчёт отклонения
+        record.deviation = record.actual_quantity - record.planned_quantity
+
+    def _process_deviations(self, record: PARecord, deviations: list[dict], user):
+        """
+        Синхронизация причин отклонения записи.
+
+        Неизменённые причины сохраняются, лишние удаляются одним запросом,
+        новые создаются одним bulk_create. Счётчики использования причин
+        корректируются одним UPDATE.
+
+        Returns:
+            int: Суммарная длительность причин записи, мин
+        """
+        submitted = []
+        for deviation in deviations:
+            reason_id = deviation.get('reason_id')
+            if not reason_id:
+                continue
+
+            try:
+                submitted.append((
+                    int(reason_id),
+                    int(deviation.get('duration') or 0),
+                    str(deviation.get('comment') or ''),
+                ))
+            except (ValueError, TypeError):
+                continue
+
+        reasons = DeviationReason.objects.filter(
+            is_active=True
+        ).in_bulk({reason_id for reason_id, _, _ in submitted})
+
+        # Сопоставляем с существующими записями по (причина, длительность, комментарий)
+        unmatched = {}
+        for entry in record.deviations.only('pk', 'reason_id', 'duration_minutes', 'comment'):
+            key = (entry.reason_id, entry.duration_minutes, entry.comment)
+            unmatched.setdefault(key, []).append(entry.pk)
+
+        to_create = []
+        for key in submitted:
+            if key[0] not in reasons:
+                continue
+            if unmatched.get(key):
+                unmatched[key].pop()
+                continue
+            reason_id, duration, comment = key
+            to_create.append(DeviationEntry(
+                record=record,
+                reason_id=reason_id,
+                duration_minutes=duration,
+                comment=comment,
+                created_by=user,
+            ))
+
+        usage_deltas = Counter(entry.reason_id for entry in to_create)
+        to_delete = []
+        for (reason_id, _, _), pks in unmatched.items():
+            usage_deltas[reason_id] -= len(pks)
+            to_delete.extend(pks)
+
+        if to_delete:
+            DeviationEntry.objects.filter(pk__in=to_delete).delete(adjust_usage=False)
+
+        if to_create:
+            DeviationEntry.objects.bulk_create(to_create)
+
+        DeviationReason.adjust_usage_counts(usage_deltas)
+
+        return sum(
+            duration for reason_id, duration, _ in submitted
+            if reason_id in reasons
+        )
@@ -0,0 +1,291 @@
+"""
+Дневные итоговые таблицы для аналитики.
+
+FR-026: Дашборды и аналитика
+FR-027: Анализ отклонений по категориям
+FR-028: Сравнительный анализ
+
+ProductionRollup и DeviationRollup хранят итоги по (дата, смена, РМ)
+и (дата, смена, РМ, причина) с участком и цехом. Строки бланка
+пересчитываются после фиксации каждого изменения бланка (ввод данных,
+закрытие смены, редактирование, удаление) — один пересчёт на транзакцию.
+Неудавшийся пересчёт не отменяет изменение: ключи отмечаются в DirtyRollup
+и пересчитываются командой close_shifts. Команда rebuild_rollups
+перестраивает таблицы целиком или за период.
+"""
+
+import logging
+from datetime import date, timedelta
+from functools import partial
+from itertools import product
+from threading import local
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Max, Min, Sum
+
+from shift_report.models import (DeviationEntry, DeviationRollup, DirtyRollup,
+                                 PABlank, ProductionRollup)
+from shift_report.services.analytics import AnalyticsCache
+
+logger = logging.getLogger(__name__)
+
+
+class RollupService:
+    """
+    Поддержка дневных итоговых таблиц.
+
+    Основные функции:
+    - Пересчёт строк изменившихся бланков
+    - Повторный пересчёт ключей, пересчёт которых не удался
+    - Полная перестройка за период
+    """
+
+    # Перестройка ведётся частями по столько дней
+    REBUILD_CHUNK_DAYS = 31
+
+    BATCH_SIZE = 1000
+
+    # Ключи, ожидающие фиксации транзакции (у каждого потока своё соединение)
+    _pending = local()
+
+    @classmethod
+    def schedule(cls, blanks) -> None:
+        """
+        Пересчёт строк бланков после фиксации текущей транзакции.
+
+        Ключи всех вызовов в одной транзакции копятся и пересчитываются
+        одним refresh первым же обработчиком on_commit.
+
+        Args:
+            blanks: Бланки (достаточно полей date, shift_id, workplace_id)
+        """
+        keys = {
+            (blank.date, blank.shift_id, blank.workplace_id)
+            for blank in blanks
+        }
+
+        if keys:
+            cls._pending_keys().update(keys)
+            transaction.on_commit(cls.flush)
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Пересчёт накопленных ключей.
+
+        Ключи откатившейся транзакции остаются в очереди и пересчитываются
+        со следующей фиксацией — лишний, но безвредный пересчёт.
+
+        Изменение к этому моменту уже зафиксировано, поэтому сбой пересчёта
+        не передаётся в запрос: он пишется в журнал, а ключи отмечаются
+        для close_shifts.
+        """
+        keys = cls._pending_keys()
+        if not keys:
+            return
+
+        cls._pending.keys = set()
+        try:
+            cls().refresh(keys)
+        except Exception:
+            logger.exception('Не удалось пересчитать итоги аналитики: %s', sorted(keys))
+            cls.mark_dirty(keys)
+
+    @classmethod
+    def mark_dirty(cls, keys) -> None:
+        """Отметка ключей (дата, смена, РМ) для повторного пересчёта"""
+        try:
+            DirtyRollup.objects.bulk_create([
+                DirtyRollup(date=day, shift_id=shift_id, workplace_id=workplace_id)
+                for day, shift_id, workplace_id in keys
+            ], ignore_conflicts=True)
+        except DatabaseError:
+            logger.exception(
+                'Не удалось отметить итоги к пересчёту, нужен rebuild_rollups: %s',
+                sorted(keys),
+            )
+
+    @classmethod
+    def _pending_keys(cls) -> set:
+        """Ключи текущего потока, ожидающие пересчёта"""
+        if not hasattr(cls._pending, 'keys'):
+            cls._pending.keys = set()
+        return cls._pending.keys
+
+    def refresh(self, keys) -> None:
+        """
+        Пересчёт строк по ключам (дата, смена, РМ).
+
+        Строки пересчитываются в прямоугольнике дат × смен × РМ ключей:
+        для одного бланка это ровно его строки, для закрытия смены
+        участка — строки всех его РМ за эту смену.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+
+        box = {
+            'date__in': {key[0] for key in keys},
+            'shift_id__in': {key[1] for key in keys},
+            'workplace_id__in': {key[2] for key in keys},
+        }
+
+        with transaction.atomic():
+            self._lock(box)
+            ProductionRollup.objects.filter(**box).delete()
+            DeviationRollup.objects.filter(**box).delete()
+            self._build(PABlank.objects.filter(**box))
+
+        # Изменение прошедшего бланка — сброс закэшированных дней аналитики
+        # (после фиксации, если пересчёт идёт во внешней транзакции)
+        transaction.on_commit(partial(
+            AnalyticsCache.invalidate_days, box['date__in'], box['workplace_id__in'],
+        ))
+
+    def refresh_dirty(self) -> int:
+        """
+        Пересчёт ключей, отмеченных после неудавшегося пересчёта.
+
+        Отметки снимаются в одной транзакции с пересчётом: при новом сбое
+        они остаются, а ключ, отмеченный заново во время пересчёта,
+        не теряется.
+
+        Returns:
+            int: Количество пересчитанных ключей
+        """
+        with transaction.atomic():
+            dirty = list(DirtyRollup.objects.values_list(
+                'pk', 'date', 'shift_id', 'workplace_id',
+            ))
+            if not dirty:
+                return 0
+
+            DirtyRollup.objects.filter(pk__in=[row[0] for row in dirty]).delete()
+            self.refresh({row[1:] for row in dirty})
+
+        return len(dirty)
+
+    def rebuild(self, date_from: date = None, date_to: date = None) -> int:
+        """
+        Полная перестройка итогов за период (по умолчанию — за всё время).
+
+        Returns:
+            int: Количество строк ProductionRollup
+        """
+        period = {}
+        if date_from:
+            period['date__gte'] = date_from
+        if date_to:
+            period['date__lte'] = date_to
+
+        blanks = PABlank.objects.filter(**period)
+        bounds = blanks.aggregate(first=Min('date'), last=Max('date'))
+
+        with transaction.atomic():
+            ProductionRollup.objects.filter(**period).delete()
+            DeviationRollup.objects.filter(**period).delete()
+
+            created = 0
+            chunk_start = bounds['first']
+            while chunk_start and chunk_start <= bounds['last']:
+                chunk_end = chunk_start + timedelta(days=self.REBUILD_CHUNK_DAYS - 1)
+                created += self._build(blanks.filter(
+                    date__gte=chunk_start,
+                    date__lte=chunk_end,
+                ))
+                chunk_start = chunk_end + timedelta(days=1)
+
+        AnalyticsCache.invalidate_all()
+
+        return created
+
+    def _lock(self, box: dict) -> None:
+        """
+        Блокировка ключей прямоугольника до конца транзакции.
+
+        Параллельные пересчёты одного ключа идут по очереди: иначе оба
+        удалят старые строки, оба вставят новые и второй упадёт на
+        уникальном ограничении. Второй пересчёт читает бланки уже после
+        фиксации первого. Вне PostgreSQL запись в БД и так последовательна.
+        """
+        if connection.vendor != 'postgresql':
+            return
+
+        keys = [
+            f'rollup:{day}:{shift_id}:{workplace_id}'
+            for day, shift_id, workplace_id in product(*box.values())
+        ]
+
+        # Блокировки берутся в одном порядке — без взаимных ожиданий
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_xact_lock(lock_id) FROM ('
+                'SELECT DISTINCT hashtext(key) AS lock_id '
+                'FROM unnest(%s::text[]) AS key ORDER BY lock_id'
+                ') AS locks',
+                [keys],
+            )
+
+    def _build(self, blanks) -> int:
+        """Создание строк итогов для набора бланков (два агрегирующих запроса)"""
+        production = blanks.order_by().values(
+            'date',
+            'shift_id',
+            'workplace_id',
+            'workplace__sector_id',
+            'workplace__sector__workshop_id',
+            'status',
+            'total_plan',
+            'total_fact',
+            'total_deviation',
+            'total_downtime',
+        ).annotate(
+            deviations_count=Count('records__deviations'),
+        )
+
+        rows = ProductionRollup.objects.bulk_create([
+            ProductionRollup(
+                date=row['date'],
+                shift_id=row['shift_id'],
+                workplace_id=row['workplace_id'],
+                sector_id=row['workplace__sector_id'],
+                workshop_id=row['workplace__sector__workshop_id'],
+                status=row['status'],
+                total_plan=row['total_plan'],
+                total_fact=row['total_fact'],
+                total_deviation=row['total_deviation'],
+                total_downtime=row['total_downtime'],
+                deviations_count=row['deviations_count'],
+            )
+            for row in production
+        ], batch_size=self.BATCH_SIZE)
+
+        deviations = DeviationEntry.objects.filter(
+            record__blank__in=blanks,
+        ).order_by().values(
+            'record__blank__date',
+            'record__blank__shift_id',
+            'record__blank__workplace_id',
+            'record__blank__workplace__sector_id',
+            'record__blank__workplace__sector__workshop_id',
+            'reason_id',
+        ).annotate(
+            entries_count=Count('id'),
+            duration=Sum('duration_minutes'),
+        )
+
+        DeviationRollup.objects.bulk_create([
+            DeviationRollup(
+                date=row['record__blank__date'],
+                shift_id=row['record__blank__shift_id'],
+                workplace_id=row['record__blank__workplace_id'],
+                sector_id=row['record__blank__workplace__sector_id'],
+                workshop_id=row['record__blank__workplace__sector__workshop_id'],
+                reason_id=row['reason_id'],
+                entries_count=row['entries_count'],
+                duration_minutes=row['duration'] or 0,
+            )
+            for row in deviations
+        ], batch_size=self.BATCH_SIZE)
+
+        return len(rows)
@@ -0,0 +1,189 @@
+"""
+Сервис автоматического закрытия смен.
+
+Бланки, смена которых завершилась (с учётом льготного периода на
+досрочный ввод последнего часа), переводятся в статус «Завершён».
+Накопительные показатели и итоги пересчитываются по записям пакетно,
+после закрытия бланк не редактируется и его итоги не меняются.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (Case, DecimalField, F, IntegerField, OuterRef, Q,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from shift_report.models import PABlank, PABlankStatus, PARecord, Shift
+from shift_report.services.change_feed import BlankChangeFeed
+from shift_report.services.rollups import RollupService
+
+
+class ShiftCloseService:
+    """
+    Сервис закрытия завершившихся смен.
+
+    Основные функции:
+    - Поиск бланков, смена которых закончилась (включая ночные смены)
+    - Финальный пересчёт накопительных показателей и итогов
+    - Перевод бланков в статус «Завершён» с фиксацией времени закрытия
+    """
+
+    # Количество бланков, закрываемых в одной транзакции
+    BATCH_SIZE = 500
+
+    OPEN_STATUSES = [PABlankStatus.DRAFT, PABlankStatus.ACTIVE]
+
+    def __init__(self, grace_minutes: int = 30):
+        """
+        Args:
+            grace_minutes: Льготный период после окончания смены, мин
+        """
+        self.grace = timedelta(minutes=grace_minutes)
+
+    def get_due_blanks(self, now: datetime = None):
+        """
+        Открытые бланки, смена которых завершилась.
+
+        Args:
+            now: Момент проверки (по умолчанию — текущее время)
+
+        Returns:
+            QuerySet: Бланки к закрытию
+        """
+        now = timezone.localtime(now)
+
+        condition = Q()
+        for shift in Shift.objects.only('pk', 'start_time', 'end_time'):
+            condition |= Q(
+                shift_id=shift.pk,
+                date__lte=self._last_finished_date(shift, now),
+            )
+
+        if not condition:
+            return PABlank.objects.none()
+
+        return PABlank.objects.filter(condition, status__in=self.OPEN_STATUSES)
+
+    def close_due_blanks(self, now: datetime = None) -> int:
+        """
+        Закрытие всех завершившихся смен.
+
+        Args:
+            now: Момент проверки (по умолчанию — текущее время)
+
+        Returns:
+            int: Количество закрытых бланков
+        """
+        now = now or timezone.now()
+
+        blank_ids = list(
+            self.get_due_blanks(now).order_by('pk').values_list('pk', flat=True)
+        )
+
+        closed = 0
+        for start in range(0, len(blank_ids), self.BATCH_SIZE):
+            closed += self.close_blanks(
+                blank_ids[start:start + self.BATCH_SIZE], now
+            )
+
+        return closed
+
+    def close_blanks(self, blank_ids: list[int], now: datetime = None) -> int:
+        """
+        Финальный пересчёт и закрытие бланков.
+
+        Пересчёт выполняется фиксированным числом запросов независимо от
+        количества бланков: накопительные показатели — одним UPDATE
+        с оконной функцией, итоги — UPDATE с подзапросами по записям.
+
+        Args:
+            blank_ids: ID бланков
+            now: Время закрытия
+
+        Returns:
+            int: Количество закрытых бланков
+        """
+        now = now or timezone.now()
+
+        with transaction.atomic():
+            # Блокируем строки бланков; закрытые параллельно пропускаем
+            blank_ids = list(
+                PABlank.objects.select_for_update().filter(
+                    pk__in=blank_ids,
+                    status__in=self.OPEN_STATUSES,
+                ).order_by('pk').values_list('pk', flat=True)
+            )
+
+            if not blank_ids:
+                return 0
+
+            PARecord.recalculate_cumulative(blank_ids)
+
+            records = PARecord.objects.filter(
+                blank=OuterRef('pk')
+            ).order_by().values('blank')
+
+            def total(field):
+                return Coalesce(
+                    Subquery(
+                        records.annotate(total=Sum(field)).values('total'),
+                        output_field=IntegerField(),
+                    ),
+                    0,
+                )
+
+            blanks = PABlank.objects.filter(pk__in=blank_ids)
+
+            blanks.update(
+                total_plan=total('planned_quantity'),
+                total_fact=total('actual_quantity'),
+                total_downtime=total('downtime_minutes'),
+                status=PABlankStatus.COMPLETED,
+                closed_at=now,
+                version=F('version') + 1,
+                updated_at=now,
+            )
+
+            decimal_field = DecimalField(max_digits=12, decimal_places=4)
+            blanks.update(
+                total_deviation=F('total_fact') - F('total_plan'),
+                completion_percentage=Case(
+                    When(
+                        total_plan__gt=0,
+                        then=(
+                            Cast('total_fact', decimal_field)
+                            * Value(Decimal('100.00'))
+                            / Cast('total_plan', decimal_field)
+                        ),
+                    ),
+                    default=Value(Decimal('0.00')),
+                    output_field=DecimalField(max_digits=6, decimal_places=2),
+                ),
+            )
+
+            # Закрытые бланки уходят с панели мониторинга
+            BlankChangeFeed.publish_many(blanks)
+            RollupService.schedule(blanks)
+
+        return len(blank_ids)
+
+    def _last_finished_date(self, shift: Shift, now: datetime) -> date:
+        """
+        Последняя дата, смена которой уже завершилась к моменту now.
+
+        Ночная смена (окончание раньше начала) заканчивается
+        на следующий календарный день после даты бланка.
+        """
+        crosses_midnight = shift.end_time < shift.start_time
+
+        # Смена даты D заканчивается в D + end_time (+1 день для ночной)
+        latest_end = now.replace(tzinfo=None) - self.grace
+        if crosses_midnight:
+            latest_end -= timedelta(days=1)
+
+        if latest_end.time() < shift.end_time:
+            return latest_end.date() - timedelta(days=1)
+        return latest_end.date()
@@ -0,0 +1,38 @@
+"""
+Обработчики сигналов моделей.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from shift_report.models import (AlertRule, DeviationGroup, DeviationReason,
+                                 PABlank, Workplace)
+from shift_report.services.alerts import AlertEngine
+from shift_report.services.reason_catalog import ReasonCatalog
+from shift_report.services.rollups import RollupService
+
+
+@receiver(post_save, sender=DeviationReason)
+@receiver(post_delete, sender=DeviationReason)
+@receiver(post_save, sender=DeviationGroup)
+@receiver(post_delete, sender=DeviationGroup)
+def invalidate_reason_catalog(sender, **kwargs):
+    """Сброс кэша справочника причин после фиксации изменений"""
+    transaction.on_commit(ReasonCatalog.invalidate)
+
+
+@receiver(post_save, sender=AlertRule)
+@receiver(post_delete, sender=AlertRule)
+@receiver(post_save, sender=Workplace)
+@receiver(post_delete, sender=Workplace)
+def invalidate_alert_rules(sender, **kwargs):
+    """Сброс скомпилированных правил оповещений после фиксации изменений"""
+    transaction.on_commit(AlertEngine.invalidate)
+
+
+@receiver(post_save, sender=PABlank)
+@receiver(post_delete, sender=PABlank)
+def refresh_blank_rollups(sender, instance, **kwargs):
+    """Пересчёт дневных итогов аналитики после создания, изменения или удаления бланка"""
+    RollupService.schedule([instance])
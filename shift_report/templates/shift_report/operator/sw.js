@@ -0,0 +1,70 @@
+// Service worker интерфейса оператора: кэш бланков и справочника причин
+const CACHE_NAME = 'shift-report-operator-v1';
+const SCOPE = '{% url "operator:dashboard" %}';
+const CATALOG_URL = '{% url "operator:reason_catalog" %}';
+
+// Страницы, доступные без сети (network-first)
+const OFFLINE_PATHS = [
+    new RegExp('^' + SCOPE + '$'),
+    new RegExp('^' + SCOPE + 'blank/\\d+/$'),
+    new RegExp('^' + SCOPE + 'record/\\d+/input/$'),
+    new RegExp('^' + CATALOG_URL + '$'),
+];
+
+// Внешние ресурсы (CSS/JS) берём из кэша
+const STATIC_HOSTS = ['cdn.jsdelivr.net'];
+
+self.addEventListener('install', event => {
+    self.skipWaiting();
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.add(CATALOG_URL))
+            .catch(() => null)
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+function networkFirst(request) {
+    return fetch(request)
+        .then(response => {
+            if (response.ok) {
+                const copy = response.clone();
+                caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+            }
+            return response;
+        })
+        .catch(() => caches.match(request));
+}
+
+function cacheFirst(request) {
+    return caches.match(request).then(cached => cached || fetch(request).then(response => {
+        const copy = response.clone();
+        caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+        return response;
+    }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+
+    if (STATIC_HOSTS.includes(url.host)) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.origin === self.location.origin &&
+               OFFLINE_PATHS.some(pattern => pattern.test(url.pathname))) {
+        event.respondWith(networkFirst(request));
+    }
+});
@@ -0,0 +1,124 @@
+"""
+Тесты интерфейса оператора.
+"""
+
+import json
+from datetime import time
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from shift_report.models import (DeviationEntry, DeviationGroup,
+                                 DeviationReason, Employee, Product, Sector,
+                                 Shift, SyncOperation, Workplace, Workshop)
+from shift_report.services import BlankGeneratorService
+
+
+class OperatorInputTestCase(TestCase):
+    """Бланк на сегодня с причиной отклонения и администратором"""
+
+    @classmethod
+    def setUpTestData(cls):
+        workshop = Workshop.objects.create(number=1, name='Цех 1')
+        sector = Sector.objects.create(workshop=workshop, number=1, name='Участок 1')
+        workplace = Workplace.objects.create(sector=sector, number=1, name='РМ 1')
+        shift = Shift.objects.create(number=1, name='Первая', start_time=time(8), end_time=time(16))
+        product = Product.objects.create(name='Изделие', article='P1')
+        group = DeviationGroup.objects.create(code='ORG', name='Организационные', color='#dc3545')
+
+        cls.reason = DeviationReason.objects.create(group=group, code='R1', name='Нет материала')
+        cls.user = Employee.objects.create_superuser('100000', '0000', first_name='Иван', last_name='Иванов')
+        cls.blank = BlankGeneratorService().create_blank(
+            workplace, timezone.localdate(), shift, product, 160, created_by=cls.user,
+        )
+        cls.record = cls.blank.records.order_by('hour_number').first()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+
+class RecordBatchInputViewTest(OperatorInputTestCase):
+    """Пакетный ввод: валидация причин отклонения"""
+
+    def post_entries(self, deviations):
+        return self.client.post(
+            reverse('operator:batch_input', args=[self.blank.pk]),
+            json.dumps({'entries': [
+                {'record_id': self.record.pk, 'actual_quantity': 0, 'deviations': deviations},
+            ]}),
+            content_type='application/json',
+        )
+
+    def test_invalid_duration_rejected(self):
+        """Некорректная длительность — 400 с номером записи и причины, без изменений в БД"""
+        for duration in (-5, 61, 1.5, 'abc', [10], True):
+            with self.subTest(duration=duration):
+                response = self.post_entries([
+                    {'reason_id': self.reason.pk, 'duration': 10},
+                    {'reason_id': self.reason.pk, 'duration': duration},
+                ])
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Запись №1', response.json()['error'])
+                self.assertIn('№2', response.json()['error'])
+
+        self.assertFalse(DeviationEntry.objects.exists())
+
+    def test_invalid_reason_rejected(self):
+        """Причина без целого reason_id или не объект — 400"""
+        for item in ({'duration': 10}, {'reason_id': 0}, {'reason_id': None}, 'R1'):
+            with self.subTest(item=item):
+                response = self.post_entries([item])
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_valid_deviations_saved(self):
+        """Длительность числом или строкой из поля ввода сохраняется"""
+        response = self.post_entries([
+            {'reason_id': self.reason.pk, 'duration': 60},
+            {'reason_id': str(self.reason.pk), 'duration': '15', 'comment': 'Ждали поставку'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(DeviationEntry.objects.values_list('duration_minutes', flat=True)),
+            [15, 60],
+        )
+
+
+class SyncQueueViewTest(OperatorInputTestCase):
+    """Офлайн-очередь: некорректная операция отклоняется отдельно"""
+
+    def test_invalid_operations_rejected_individually(self):
+        records = list(self.blank.records.order_by('hour_number')[:4])
+        operations = [
+            {'key': 'numeric-time', 'record_id': records[0].pk, 'actual_quantity': 5,
+             'created_at': 1760000000},
+            {'key': 'bad-time', 'record_id': records[1].pk, 'actual_quantity': 5,
+             'created_at': 'вчера'},
+            {'key': 'negative-duration', 'record_id': records[2].pk, 'actual_quantity': 5,
+             'deviations': [{'reason_id': self.reason.pk, 'duration': -4}]},
+            {'key': 'valid', 'record_id': records[3].pk, 'actual_quantity': 5,
+             'created_at': '2026-01-01T10:00:00+03:00',
+             'deviations': [{'reason_id': self.reason.pk, 'duration': 12}]},
+        ]
+
+        response = self.client.post(
+            reverse('operator:sync'),
+            json.dumps({'operations': operations}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], {
+            'numeric-time': 'rejected',
+            'bad-time': 'rejected',
+            'negative-duration': 'rejected',
+            'valid': 'applied',
+        })
+        self.assertEqual(
+            list(SyncOperation.objects.values_list('idempotency_key', flat=True)),
+            ['valid'],
+        )
+        self.assertEqual(list(DeviationEntry.objects.values_list('duration_minutes', flat=True)), [12])
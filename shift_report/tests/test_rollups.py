@@ -0,0 +1,38 @@
+"""
+Тесты поддержки итоговых таблиц аналитики.
+"""
+
+from unittest import mock
+
+from django.db import DatabaseError
+from django.urls import reverse
+
+from shift_report.models import DirtyRollup, ProductionRollup
+from shift_report.services import RollupService
+
+from .test_operator import OperatorInputTestCase
+
+
+class RollupFailureTest(OperatorInputTestCase):
+    """Сбой пересчёта после фиксации не ломает сохранение"""
+
+    def test_failed_refresh_marks_key_dirty(self):
+        """Запрос успешен, ключ отмечен и пересчитывается позже"""
+        with mock.patch.object(RollupService, '_build', side_effect=DatabaseError('lock timeout')):
+            with self.assertLogs('shift_report.services.rollups', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        reverse('operator:quick_input', args=[self.record.pk]),
+                        {'actual_quantity': 20},
+                    )
+
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(ProductionRollup.objects.exists())
+        self.assertQuerySetEqual(
+            DirtyRollup.objects.values_list('date', 'shift_id', 'workplace_id'),
+            [(self.blank.date, self.blank.shift_id, self.blank.workplace_id)],
+        )
+
+        self.assertEqual(RollupService().refresh_dirty(), 1)
+        self.assertFalse(DirtyRollup.objects.exists())
+        self.assertEqual(ProductionRollup.objects.get().total_fact, 20)
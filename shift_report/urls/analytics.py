@@ -6,7 +6,8 @@ from django.urls import path
 
 from shift_report.views.analytics import (ChartDataAPIView, ComparisonView,
                                           DashboardAPIView, DashboardView,
-                                          DeviationsAnalysisView, ReportsView)
+                                          DeviationsAnalysisView,
+                                          DrillDownAPIView, ReportsView)
 
 app_name = 'analytics'
 
@@ -26,4 +27,5 @@ urlpatterns = [
     # API
     path('api/dashboard/', DashboardAPIView.as_view(), name='api_dashboard'),
     path('api/chart/<str:chart_type>/', ChartDataAPIView.as_view(), name='api_chart'),
+    path('api/drilldown/', DrillDownAPIView.as_view(), name='api_drilldown'),
 ]
@@ -4,10 +4,12 @@ URL-маршруты для панели мониторинга мастера.
 
 from django.urls import path
 
-from shift_report.views.master import (AddMeasureView, BlankMonitorView,
-                                       BlankStatusAPIView,
+from shift_report.views.master import (AddMeasureView, AlertsAPIView,
+                                       BlankDeviationsAPIView,
+                                       BlankMonitorView, BlankStatusAPIView,
                                        MasterMonitoringView, MonitoringAPIView,
-                                       WorkplaceDetailView)
+                                       MonitoringStreamView, SectorCardsView,
+                                       WallboardView, WorkplaceDetailView)
 
 app_name = 'master'
 
@@ -15,6 +17,12 @@ urlpatterns = [
     # Главная панель мониторинга
     path('', MasterMonitoringView.as_view(), name='monitoring'),
 
+    # Карточки участка для обзора цеха (фрагмент)
+    path('sector/<int:sector_id>/cards/', SectorCardsView.as_view(), name='sector_cards'),
+
+    # Режим табло для общих экранов
+    path('wallboard/', WallboardView.as_view(), name='wallboard'),
+
     # Детальный просмотр рабочего места
     path('workplace/<int:workplace_id>/', WorkplaceDetailView.as_view(), name='workplace_detail'),
 
@@ -27,4 +35,7 @@ urlpatterns = [
     # API для real-time обновлений
     path('api/status/', MonitoringAPIView.as_view(), name='api_status'),
     path('api/blank/<int:blank_id>/', BlankStatusAPIView.as_view(), name='api_blank_status'),
+    path('api/blank/<int:blank_id>/deviations/', BlankDeviationsAPIView.as_view(), name='api_blank_deviations'),
+    path('api/stream/', MonitoringStreamView.as_view(), name='api_stream'),
+    path('api/alerts/', AlertsAPIView.as_view(), name='api_alerts'),
 ]
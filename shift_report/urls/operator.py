@@ -6,7 +6,9 @@ from django.urls import path
 
 from shift_report.views.operator import (BlankDetailView,
                                          OperatorDashboardView, QuickInputView,
-                                         ReasonSearchView, RecordInputView)
+                                         ReasonCatalogView, ReasonSearchView,
+                                         RecordBatchInputView, RecordInputView,
+                                         ServiceWorkerView, SyncQueueView)
 
 app_name = 'operator'
 
@@ -23,6 +25,16 @@ urlpatterns = [
     # Быстрый ввод (AJAX)
     path('record/<int:record_id>/quick/', QuickInputView.as_view(), name='quick_input'),
 
+    # Пакетный ввод нескольких часов (AJAX)
+    path('blank/<int:blank_id>/batch/', RecordBatchInputView.as_view(), name='batch_input'),
+
     # Поиск причин (API)
     path('reasons/search/', ReasonSearchView.as_view(), name='reason_search'),
+
+    # Справочник причин для офлайн-режима (API)
+    path('reasons/catalog/', ReasonCatalogView.as_view(), name='reason_catalog'),
+
+    # Офлайн-очередь: синхронизация и service worker
+    path('sync/', SyncQueueView.as_view(), name='sync'),
+    path('sw.js', ServiceWorkerView.as_view(), name='service_worker'),
 ]
@@ -1,18 +1,23 @@
 from .admin_views import (AdminDashboardView, DirectoryListView, ExportView,
                           ImportView, TemplateDownloadView)
 from .analytics import (ChartDataAPIView, ComparisonView, DashboardAPIView,
-                        DashboardView, DeviationsAnalysisView, ReportsView)
+                        DashboardView, DeviationsAnalysisView,
+                        DrillDownAPIView, ReportsView)
 from .auth import ChangePINView, HomeView, LoginView, LogoutView, ProfileView
 from .blanks import (BlankBulkCreateView, BlankCreateView, BlankDeleteView,
                      BlankDetailView, BlankListView, CalculatePlanAPIView,
                      TemplateCreateView, TemplateDeleteView, TemplateEditView,
                      TemplateListView, WorkplaceAPIView)
-from .master import (AddMeasureView, BlankMonitorView, BlankStatusAPIView,
+from .master import (AddMeasureView, AlertsAPIView, BlankDeviationsAPIView,
+                     BlankMonitorView, BlankStatusAPIView,
                      MasterMonitoringView, MonitoringAPIView,
+                     MonitoringStreamView, SectorCardsView, WallboardView,
                      WorkplaceDetailView)
 from .operator import BlankDetailView as OperatorBlankDetailView
-from .operator import (OperatorDashboardView, QuickInputView, ReasonSearchView,
-                       RecordInputView)
+from .operator import (OperatorDashboardView, QuickInputView,
+                       ReasonCatalogView, ReasonSearchView,
+                       RecordBatchInputView, RecordInputView,
+                       ServiceWorkerView, SyncQueueView)
 
 __all__ = [
     # Auth
@@ -26,14 +31,23 @@ __all__ = [
     'OperatorBlankDetailView',
     'RecordInputView',
     'QuickInputView',
+    'RecordBatchInputView',
     'ReasonSearchView',
+    'ReasonCatalogView',
+    'SyncQueueView',
+    'ServiceWorkerView',
     # Master
     'MasterMonitoringView',
+    'WallboardView',
+    'SectorCardsView',
     'WorkplaceDetailView',
     'BlankMonitorView',
     'AddMeasureView',
     'MonitoringAPIView',
+    'MonitoringStreamView',
     'BlankStatusAPIView',
+    'BlankDeviationsAPIView',
+    'AlertsAPIView',
     # Blanks
     'BlankListView',
     'BlankCreateView',
@@ -54,6 +68,7 @@ __all__ = [
     'ReportsView',
     'DashboardAPIView',
     'ChartDataAPIView',
+    'DrillDownAPIView',
 
     # Admin
     'AdminDashboardView',
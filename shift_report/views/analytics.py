@@ -7,7 +7,7 @@ FR-028: Сравнительный анализ
 FR-029: Drill-down анализ
 """
 
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 
 from django.http import JsonResponse
 from django.shortcuts import render
@@ -35,23 +35,8 @@ class DashboardView(MasterRequiredMixin, View):
 
         today = timezone.localdate()
 
-        if date_from_str:
-            try:
-                from datetime import datetime
-                date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
-            except ValueError:
-                date_from = today - timedelta(days=7)
-        else:
-            date_from = today - timedelta(days=7)
-
-        if date_to_str:
-            try:
-                from datetime import datetime
-                date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-            except ValueError:
-                date_to = today
-        else:
-            date_to = today
+        date_from = _parse_date(date_from_str, today - timedelta(days=7))
+        date_to = _parse_date(date_to_str, today)
 
         # Определяем область видимости
         workshop = None
@@ -65,18 +50,12 @@ class DashboardView(MasterRequiredMixin, View):
         # Получаем данные
         service = AnalyticsService()
 
-        summary = service.get_dashboard_summary(date_from, date_to, workshop, sector)
-        daily_dynamics = service.get_daily_dynamics(date_from, date_to, workshop, sector)
-        deviations_by_category = service.get_deviations_by_category(date_from, date_to, workshop, sector)
-        top_deviations = service.get_top_deviations(date_from, date_to, workshop, sector, limit=5)
+        bundle = service.get_dashboard_bundle(date_from, date_to, workshop, sector, top_limit=5)
 
         return render(request, self.template_name, {
             'date_from': date_from,
             'date_to': date_to,
-            'summary': summary,
-            'daily_dynamics': daily_dynamics,
-            'deviations_by_category': deviations_by_category,
-            'top_deviations': top_deviations,
+            **bundle,
             'current_sector': sector,
             'current_workshop': workshop,
         })
@@ -98,8 +77,8 @@ class DeviationsAnalysisView(MasterRequiredMixin, View):
         date_to_str = request.GET.get('date_to')
 
         today = timezone.localdate()
-        date_from = self._parse_date(date_from_str, today - timedelta(days=30))
-        date_to = self._parse_date(date_to_str, today)
+        date_from = _parse_date(date_from_str, today - timedelta(days=30))
+        date_to = _parse_date(date_to_str, today)
 
         workshop = user.workshop if not user.sector else None
         sector = user.sector
@@ -118,15 +97,6 @@ class DeviationsAnalysisView(MasterRequiredMixin, View):
             'pareto': pareto,
         })
 
-    def _parse_date(self, date_str, default):
-        if date_str:
-            try:
-                from datetime import datetime
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
-            except ValueError:
-                pass
-        return default
-
 
 class ComparisonView(MasterRequiredMixin, View):
     """
@@ -145,8 +115,8 @@ class ComparisonView(MasterRequiredMixin, View):
         compare_by = request.GET.get('compare_by', 'workplace')
 
         today = timezone.localdate()
-        date_from = self._parse_date(date_from_str, today - timedelta(days=30))
-        date_to = self._parse_date(date_to_str, today)
+        date_from = _parse_date(date_from_str, today - timedelta(days=30))
+        date_to = _parse_date(date_to_str, today)
 
         workshop = user.workshop if not user.sector else None
         sector = user.sector
@@ -168,15 +138,6 @@ class ComparisonView(MasterRequiredMixin, View):
             'hourly_pattern': hourly_pattern,
         })
 
-    def _parse_date(self, date_str, default):
-        if date_str:
-            try:
-                from datetime import datetime
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
-            except ValueError:
-                pass
-        return default
-
 
 class ReportsView(ChiefRequiredMixin, View):
     """
@@ -203,29 +164,20 @@ class DashboardAPIView(MasterRequiredMixin, View):
         date_to_str = request.GET.get('date_to')
 
         today = timezone.localdate()
-        date_from = self._parse_date(date_from_str, today - timedelta(days=7))
-        date_to = self._parse_date(date_to_str, today)
+        date_from = _parse_date(date_from_str, today - timedelta(days=7))
+        date_to = _parse_date(date_to_str, today)
 
         workshop = user.workshop if not user.sector else None
         sector = user.sector
 
-        service = AnalyticsService()
+        bundle = AnalyticsService().get_dashboard_bundle(date_from, date_to, workshop, sector)
 
         return JsonResponse({
-            'summary': service.get_dashboard_summary(date_from, date_to, workshop, sector),
-            'daily_dynamics': service.get_daily_dynamics(date_from, date_to, workshop, sector),
-            'deviations_by_category': service.get_deviations_by_category(date_from, date_to, workshop, sector),
+            'summary': bundle['summary'],
+            'daily_dynamics': bundle['daily_dynamics'],
+            'deviations_by_category': bundle['deviations_by_category'],
         })
 
-    def _parse_date(self, date_str, default):
-        if date_str:
-            try:
-                from datetime import datetime
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
-            except ValueError:
-                pass
-        return default
-
 
 class ChartDataAPIView(MasterRequiredMixin, View):
     """
@@ -239,8 +191,8 @@ class ChartDataAPIView(MasterRequiredMixin, View):
         date_to_str = request.GET.get('date_to')
 
         today = timezone.localdate()
-        date_from = self._parse_date(date_from_str, today - timedelta(days=30))
-        date_to = self._parse_date(date_to_str, today)
+        date_from = _parse_date(date_from_str, today - timedelta(days=30))
+        date_to = _parse_date(date_to_str, today)
 
         workshop = user.workshop if not user.sector else None
         sector = user.sector
@@ -262,11 +214,53 @@ class ChartDataAPIView(MasterRequiredMixin, View):
 
         return JsonResponse({'data': data})
 
-    def _parse_date(self, date_str, default):
-        if date_str:
+
+class DrillDownAPIView(MasterRequiredMixin, View):
+    """
+    API drill-down: итоги потомков узла иерархии.
+    FR-029
+
+    Параметры: level (enterprise, workshop, sector, workplace, blank),
+    id — идентификатор узла (не нужен для enterprise), date_from, date_to.
+    """
+
+    def get(self, request):
+        user = request.user
+
+        level = request.GET.get('level', 'enterprise')
+        if level not in AnalyticsService.DRILLDOWN_LEVELS:
+            return JsonResponse({'error': 'Неизвестный уровень'}, status=400)
+
+        node_id = None
+        if level != 'enterprise':
             try:
-                from datetime import datetime
-                return datetime.strptime(date_str, '%Y-%m-%d').date()
+                node_id = int(request.GET.get('id', ''))
             except ValueError:
-                pass
-        return default
+                return JsonResponse({'error': 'Не указан идентификатор узла'}, status=400)
+
+        today = timezone.localdate()
+        date_from = _parse_date(request.GET.get('date_from'), today - timedelta(days=30))
+        date_to = _parse_date(request.GET.get('date_to'), today)
+
+        workshop = user.workshop if not user.sector else None
+        sector = user.sector
+
+        children = AnalyticsService().get_drilldown(
+            level, node_id, date_from, date_to, workshop, sector
+        )
+
+        return JsonResponse({
+            'level': level,
+            'id': node_id,
+            'children': children,
+        })
+
+
+def _parse_date(date_str, default: date) -> date:
+    """Дата из параметра запроса (ГГГГ-ММ-ДД) или значение по умолчанию"""
+    if date_str:
+        try:
+            return datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return default
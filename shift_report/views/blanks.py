@@ -18,7 +18,8 @@ from django.views import View
 from shift_report.decorators import MasterRequiredMixin
 from shift_report.forms import (BlankBulkCreateForm, BlankCreateForm,
                                 BlankEditForm, TemplateCreateForm)
-from shift_report.models import PABlank, PATemplate, Product, Shift, Workplace
+from shift_report.models import (BlankVersionConflict, PABlank, PATemplate,
+                                 Product, Shift, Workplace)
 from shift_report.services import BlankGeneratorService
 
 
@@ -314,14 +315,37 @@ class BlankDetailView(MasterRequiredMixin, View):
         form = BlankEditForm(instance=blank, data=request.POST)
 
         if form.is_valid():
-            with transaction.atomic():
-                old_quantity = blank.planned_quantity
-                blank = form.save()
-
-                # Пересчитываем записи при изменении плана
-                if blank.planned_quantity != old_quantity:
-                    service = BlankGeneratorService()
-                    service.recalculate_blank(blank)
+            try:
+                with transaction.atomic():
+                    # Compare-and-swap по версии бланка
+                    locked = PABlank.lock(blank.pk)
+                    if locked.closed_at:
+                        messages.error(request, 'Смена закрыта, бланк не редактируется')
+                        return redirect('blanks:detail', blank_id=blank.pk)
+
+                    submitted_version = form.cleaned_data.get('version')
+                    if submitted_version is not None and submitted_version != locked.version:
+                        raise BlankVersionConflict()
+
+                    old_quantity = locked.planned_quantity
+                    blank = form.save(commit=False)
+                    blank.version = locked.version + 1
+                    blank.save(update_fields=[
+                        'planned_quantity', 'status', 'notes',
+                        'version', 'updated_at',
+                    ])
+
+                    # Пересчитываем записи при изменении плана
+                    if blank.planned_quantity != old_quantity:
+                        service = BlankGeneratorService()
+                        service.recalculate_blank(blank)
+            except BlankVersionConflict:
+                messages.error(
+                    request,
+                    'Бланк был изменён другим пользователем. '
+                    'Проверьте актуальные данные и повторите изменения.'
+                )
+                return redirect('blanks:detail', blank_id=blank.pk)
 
             messages.success(request, 'Бланк обновлён')
             return redirect('blanks:detail', blank_id=blank.pk)
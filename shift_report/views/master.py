@@ -7,17 +7,31 @@ FR-021: Детализация по часам
 FR-025: Фиксация принятых мер
 """
 
+import json
+import logging
+import time
+from datetime import timedelta
+
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Count, Sum
-from django.http import JsonResponse
+from django.db.models import Exists, OuterRef, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views import View
 
 from shift_report.decorators import MasterRequiredMixin
-from shift_report.models import (DeviationEntry, PABlank, Sector, TakenMeasure,
-                                 Workplace)
+from shift_report.models import (DeviationEntry, PABlank, PARecord,
+                                 TakenMeasure, Workplace)
+from shift_report.services.alerts import AlertService
+from shift_report.services.change_feed import BlankChangeFeed
+from shift_report.services.columnar import (ColumnarPayload,
+                                            compact_json_response)
+from shift_report.services.monitoring import (MonitoringService,
+                                              MonitoringSnapshot)
+
+logger = logging.getLogger(__name__)
 
 
 class MasterMonitoringView(MasterRequiredMixin, View):
@@ -33,104 +47,75 @@ class MasterMonitoringView(MasterRequiredMixin, View):
     def get(self, request):
         user = request.user
         today = timezone.localdate()
+        started = time.perf_counter()
 
-        # Определяем участок для мониторинга
-        if user.sector:
-            sector = user.sector
-        elif user.workshop:
-            # Начальник цеха видит все участки
-            sectors = Sector.objects.filter(
-                workshop=user.workshop,
-                is_active=True
-            )
-            sector = None
+        service = MonitoringService()
+        if not user.sector and user.workshop:
+            # Начальник цеха: плитки участков, карточки — по раскрытию
+            board = service.get_workshop_overview(user, today)
         else:
-            sector = None
-            sectors = Sector.objects.none()
+            # Карточки бланков на сегодня: одна проекция без почасовых записей
+            board = service.get_board(user, today)
+        board_ms = (time.perf_counter() - started) * 1000
 
-        # Получаем бланки на сегодня
-        blanks_qs = PABlank.objects.filter(
-            date=today,
-            status__in=['draft', 'active'],
-        ).select_related(
-            'workplace',
-            'workplace__sector',
-            'product',
-            'shift',
-        ).prefetch_related(
-            'records',
+        render_started = time.perf_counter()
+        response = render(request, self.template_name, {
+            **board,
+            'today': today,
+            'current_sector': user.sector,
+        })
+
+        # Стоимость страницы видна в DevTools браузера (вкладка Timing)
+        cards_count = board['cards_count']
+        sectors_count = len(board['sectors_data'])
+        response['Server-Timing'] = (
+            f'board;desc="{cards_count} cards, {sectors_count} sectors";dur={board_ms:.1f}, '
+            f'render;dur={(time.perf_counter() - render_started) * 1000:.1f}'
         )
+        return response
 
-        if sector:
-            blanks_qs = blanks_qs.filter(workplace__sector=sector)
-            sectors = [sector]  # noqa: F841
-        elif user.workshop:
-            blanks_qs = blanks_qs.filter(workplace__sector__workshop=user.workshop)
-
-        blanks = blanks_qs.order_by('workplace__sector__number', 'workplace__number')
-
-        # Группируем по участкам
-        sectors_data = {}
-        total_plan = 0
-        total_fact = 0
-        total_deviation = 0
-
-        for blank in blanks:
-            sector_id = blank.workplace.sector_id
-            if sector_id not in sectors_data:
-                sectors_data[sector_id] = {
-                    'sector': blank.workplace.sector,
-                    'blanks': [],
-                    'total_plan': 0,
-                    'total_fact': 0,
-                    'total_deviation': 0,
-                }
-            sectors_data[sector_id]['blanks'].append(blank)
-            sectors_data[sector_id]['total_plan'] += blank.total_plan or 0
-            sectors_data[sector_id]['total_fact'] += blank.total_fact or 0
-            sectors_data[sector_id]['total_deviation'] += blank.total_deviation or 0
-
-            # Суммируем общие итоги
-            total_plan += blank.total_plan or 0
-            total_fact += blank.total_fact or 0
-            total_deviation += blank.total_deviation or 0
-
-        # Рассчитываем процент выполнения для каждого участка
-        for data in sectors_data.values():
-            if data['total_plan'] > 0:
-                data['completion'] = round(data['total_fact'] / data['total_plan'] * 100, 1)
-            else:
-                data['completion'] = 0
-
-        # Статистика по отклонениям
-        deviations_today = DeviationEntry.objects.filter(
-            record__blank__date=today,
+
+class SectorCardsView(MasterRequiredMixin, View):
+    """
+    Карточки рабочих мест одного участка (HTML-фрагмент).
+
+    Загружается обзором цеха при раскрытии плитки участка. Бланки
+    ограничены областью пользователя, поэтому чужой участок даёт
+    пустой фрагмент.
+    """
+
+    template_name = 'shift_report/master/_sector_cards.html'
+
+    def get(self, request, sector_id):
+        blanks = MonitoringService().get_sector_cards(
+            request.user, timezone.localdate(), sector_id
         )
-        if sector:
-            deviations_today = deviations_today.filter(
-                record__blank__workplace__sector=sector
-            )
-        elif user.workshop:
-            deviations_today = deviations_today.filter(
-                record__blank__workplace__sector__workshop=user.workshop
-            )
 
-        deviations_stats = deviations_today.values(
-            'reason__group__name',
-            'reason__group__color',
-        ).annotate(
-            count=Count('id'),
-            total_duration=Sum('duration_minutes'),
-        ).order_by('-count')[:5]
+        return render(request, self.template_name, {'blanks': blanks})
+
+
+class WallboardView(MasterRequiredMixin, View):
+    """
+    Режим табло: панель мониторинга для общих экранов цеха.
+
+    Доска строится один раз на участок или цех за интервал обновления
+    и отдаётся всем экранам с той же областью из общего кэша. С параметром
+    fragment=1 возвращается только разметка доски (для автообновления).
+    """
+
+    template_name = 'shift_report/master/wallboard.html'
+
+    def get(self, request):
+        board_html = MonitoringSnapshot.get_html(request.user)
+
+        if request.GET.get('fragment'):
+            return HttpResponse(board_html)
 
         return render(request, self.template_name, {
-            'sectors_data': sectors_data,
-            'total_plan': total_plan,
-            'total_fact': total_fact,
-            'total_deviation': total_deviation,
-            'today': today,
-            'deviations_stats': deviations_stats,
-            'current_sector': sector,
+            'board_html': board_html,
+            'today': timezone.localdate(),
+            'current_sector': request.user.sector,
+            'refresh_seconds': MonitoringSnapshot.REFRESH_SECONDS,
         })
 
 
@@ -249,25 +234,8 @@ class BlankMonitorView(MasterRequiredMixin, View):
                 current_hour = record.hour_number
                 break
 
-        # Статистика отклонений
-        deviations = DeviationEntry.objects.filter(
-            record__blank=blank
-        ).select_related(
-            'reason',
-            'reason__group',
-        )
-
-        deviations_by_group = {}
-        for dev in deviations:
-            group_name = dev.reason.group.name
-            if group_name not in deviations_by_group:
-                deviations_by_group[group_name] = {
-                    'color': dev.reason.group.color,
-                    'count': 0,
-                    'duration': 0,
-                }
-            deviations_by_group[group_name]['count'] += 1
-            deviations_by_group[group_name]['duration'] += dev.duration_minutes or 0
+        # Статистика отклонений — из уже загруженных причин
+        deviations_by_group = MonitoringService.group_deviations(records)
 
         return render(request, self.template_name, {
             'blank': blank,
@@ -287,6 +255,43 @@ class BlankMonitorView(MasterRequiredMixin, View):
         return False
 
 
+class BlankDeviationsAPIView(MasterRequiredMixin, View):
+    """
+    API сводки причин отклонений бланка по группам.
+
+    Позволяет обновлять блок «Причины отклонений» страницы мониторинга
+    бланка без её перезагрузки.
+    """
+
+    def get(self, request, blank_id):
+        blank = get_object_or_404(
+            PABlank.objects.select_related('workplace__sector'),
+            pk=blank_id,
+        )
+
+        if not self._can_access_blank(request.user, blank):
+            return JsonResponse({'error': 'Нет доступа к бланку'}, status=403)
+
+        groups = MonitoringService().get_deviation_groups(blank.pk)
+
+        return JsonResponse({
+            'groups': [
+                {'name': name, **stats}
+                for name, stats in groups.items()
+            ],
+        })
+
+    def _can_access_blank(self, user, blank):
+        """Проверка доступа к бланку"""
+        if user.is_admin or user.is_superuser:
+            return True
+        if user.is_chief:
+            return blank.workplace.sector.workshop_id == user.workshop_id
+        if user.is_master:
+            return blank.workplace.sector_id == user.sector_id
+        return False
+
+
 class AddMeasureView(MasterRequiredMixin, View):
     """
     Добавление принятой меры к отклонению.
@@ -376,50 +381,210 @@ class MonitoringAPIView(MasterRequiredMixin, View):
     API для обновления данных мониторинга в реальном времени.
 
     Возвращает JSON с текущим состоянием бланков.
+
+    С параметром since (значение cursor из предыдущего ответа) возвращает
+    только бланки, изменившиеся после курсора или у которых за это время
+    завершился час, а в removed — бланки, закрытые или отменённые за это
+    время. Без since или при смене суток возвращается полный список.
+
+    С параметром format=columnar бланки передаются по колонкам, а названия
+    рабочих мест и продукции — номерами сессионного словаря (параметр
+    known — сколько записей словаря клиент уже получил).
     """
 
+    COLUMNAR_FIELDS = [
+        'id', 'workplace_id', 'workplace_name', 'product_name',
+        'total_plan', 'total_fact', 'total_deviation', 'completion',
+        'projected_completion', 'status',
+    ]
+    COLUMNAR_ENCODED = ('workplace_name', 'product_name')
+
+    # Запас на транзакции, зафиксированные позже своего updated_at
+    CURSOR_OVERLAP = timedelta(seconds=5)
+
     def get(self, request):
         user = request.user
-        today = timezone.localdate()
+        now = timezone.now()
+        today = timezone.localdate(now)
+        since = self._parse_since(request.GET.get('since'), today)
 
         # Фильтруем бланки по доступу пользователя
-        blanks_qs = PABlank.objects.filter(
-            date=today,
-            status__in=['draft', 'active'],
-        ).select_related(
-            'workplace',
-            'product',
-        )
+        scope_qs = PABlank.objects.filter(date=today)
 
         if user.sector:
-            blanks_qs = blanks_qs.filter(workplace__sector=user.sector)
+            scope_qs = scope_qs.filter(workplace__sector=user.sector)
         elif user.workshop:
-            blanks_qs = blanks_qs.filter(workplace__sector__workshop=user.workshop)
+            scope_qs = scope_qs.filter(workplace__sector__workshop=user.workshop)
+
+        blanks_qs = scope_qs.filter(status__in=['draft', 'active'])
+
+        removed = []
+        if since:
+            # Процент на текущий момент меняется и без записи — по окончании часа
+            hour_finished = PARecord.objects.filter(
+                blank=OuterRef('pk'),
+                end_time__gt=timezone.localtime(since).time(),
+                end_time__lte=timezone.localtime(now).time(),
+            )
+            blanks_qs = blanks_qs.filter(
+                Q(updated_at__gte=since) | Exists(hour_finished)
+            )
+
+            removed = list(scope_qs.filter(
+                status__in=['completed', 'cancelled'],
+                updated_at__gte=since,
+            ).values_list('pk', flat=True))
 
         data = []
-        for blank in blanks_qs:
+        for card in MonitoringService().get_cards(blanks_qs, now):
             data.append({
-                'id': blank.pk,
-                'workplace_id': blank.workplace_id,
-                'workplace_name': blank.workplace.name,
-                'product_name': blank.product.name,
-                'total_plan': blank.total_plan,
-                'total_fact': blank.total_fact,
-                'total_deviation': blank.total_deviation,
-                'completion': float(blank.current_completion_percentage),  # ИЗМЕНЕНО: используем current_completion_percentage
-                'status': blank.status,
+                'id': card['id'],
+                'workplace_id': card['workplace_id'],
+                'workplace_name': card['workplace_name'],
+                'product_name': card['product_name'],
+                'total_plan': card['total_plan'],
+                'total_fact': card['total_fact'],
+                'total_deviation': card['total_deviation'],
+                'completion': float(card['completion']),
+                'projected_completion': (
+                    float(card['projected_completion'])
+                    if card['projected_completion'] is not None else None
+                ),
+                'status': card['status'],
+            })
+
+        if request.GET.get('format') == 'columnar':
+            payload = ColumnarPayload(request.session, _parse_known(request))
+            return compact_json_response({
+                'format': 'columnar',
+                'blanks': payload.columns(
+                    data, self.COLUMNAR_FIELDS, self.COLUMNAR_ENCODED
+                ),
+                'dictionary': payload.dictionary(),
+                'removed': removed,
+                'cursor': now.isoformat(),
+                'incremental': since is not None,
             })
 
-        return JsonResponse({'blanks': data})
+        return JsonResponse({
+            'blanks': data,
+            'removed': removed,
+            'cursor': now.isoformat(),
+            'incremental': since is not None,
+        })
+
+    def _parse_since(self, value, today):
+        """Курсор с запасом; None — нужен полный список"""
+        since = parse_datetime(value or '')
+        if since is None or timezone.is_naive(since):
+            return None
+
+        since -= self.CURSOR_OVERLAP
+
+        # Курсор вчерашних суток: набор бланков сменился целиком
+        if timezone.localdate(since) != today:
+            return None
+
+        return since
+
+
+class MonitoringStreamView(View):
+    """
+    Push-канал обновлений мониторинга (Server-Sent Events).
+
+    Отправляет итоги бланков сразу после их изменения, только в пределах
+    участка или цеха пользователя. Требует ASGI-сервера (config/asgi.py);
+    при работе через WSGI отвечает 204 (с предупреждением в логе, один раз
+    на процесс), и страница остаётся на опросе master:api_status.
+    """
+
+    allowed_roles = MasterRequiredMixin.allowed_roles
+
+    # Интервал служебных сообщений, удерживающих соединение, сек
+    HEARTBEAT_SECONDS = 15
+
+    _wsgi_warned = False
+
+    async def get(self, request):
+        user = await request.auser()
+
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+
+        if not (user.is_admin or user.is_superuser or user.role in self.allowed_roles):
+            return HttpResponse(status=403)
+
+        # Бесконечный поток нельзя отдать синхронным обработчиком
+        if not hasattr(request, 'scope'):
+            if not MonitoringStreamView._wsgi_warned:
+                MonitoringStreamView._wsgi_warned = True
+                logger.warning(
+                    'Push-канал мониторинга недоступен: приложение запущено '
+                    'через WSGI, табло переходят на опрос. Запустите '
+                    'config.asgi:application (см. gunicorn.conf.py)'
+                )
+            return HttpResponse(status=204)
+
+        workplaces = Workplace.objects.all()
+        if user.sector_id:
+            workplaces = workplaces.filter(sector_id=user.sector_id)
+        elif user.workshop_id:
+            workplaces = workplaces.filter(sector__workshop_id=user.workshop_id)
+        else:
+            workplaces = None
+
+        if workplaces is not None:
+            workplaces = {
+                pk async for pk in workplaces.values_list('pk', flat=True)
+            }
+
+        response = StreamingHttpResponse(
+            self._stream(workplaces),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _stream(self, workplaces):
+        """События изменений бланков рабочих мест пользователя"""
+        subscription = BlankChangeFeed.subscribe()
+
+        try:
+            yield 'retry: 5000\n\n'
+
+            while True:
+                event = await subscription.get(timeout=self.HEARTBEAT_SECONDS)
+
+                if event is None:
+                    yield ': ping\n\n'
+                    continue
+
+                if event['date'] != timezone.localdate().isoformat():
+                    continue
+
+                if workplaces is not None and event['workplace_id'] not in workplaces:
+                    continue
+
+                yield f'event: blank\ndata: {json.dumps(event)}\n\n'
+        finally:
+            subscription.close()
 
 
 class BlankStatusAPIView(MasterRequiredMixin, View):
     """
     API для получения статуса конкретного бланка.
+
+    Поддерживает format=columnar (записи по колонкам).
     """
 
+    COLUMNAR_FIELDS = [
+        'hour_number', 'planned_quantity', 'actual_quantity', 'deviation',
+        'is_filled', 'cumulative_plan', 'cumulative_fact', 'cumulative_deviation',
+    ]
+
     def get(self, request, blank_id):
-        blank = get_object_or_404(PABlank, pk=blank_id)
+        blank = get_object_or_404(PABlank.objects.with_progress(), pk=blank_id)
 
         records_data = []
         for record in blank.records.all().order_by('hour_number'):
@@ -434,14 +599,64 @@ class BlankStatusAPIView(MasterRequiredMixin, View):
                 'cumulative_deviation': record.cumulative_deviation,
             })
 
+        blank_data = {
+            'id': blank.pk,
+            'total_plan': blank.total_plan,
+            'total_fact': blank.total_fact,
+            'total_deviation': blank.total_deviation,
+            'completion': float(blank.current_completion_percentage),
+            'status': blank.status,
+        }
+
+        if request.GET.get('format') == 'columnar':
+            payload = ColumnarPayload(request.session, _parse_known(request))
+            return compact_json_response({
+                'format': 'columnar',
+                'blank': blank_data,
+                'records': payload.columns(records_data, self.COLUMNAR_FIELDS),
+            })
+
         return JsonResponse({
-            'blank': {
-                'id': blank.pk,
-                'total_plan': blank.total_plan,
-                'total_fact': blank.total_fact,
-                'total_deviation': blank.total_deviation,
-                'completion': float(blank.current_completion_percentage),  # ИЗМЕНЕНО: используем current_completion_percentage
-                'status': blank.status,
-            },
+            'blank': blank_data,
             'records': records_data,
-        })
\ No newline at end of file
+        })
+
+
+class AlertsAPIView(MasterRequiredMixin, View):
+    """
+    API оповещений мастера.
+
+    GET — непросмотренные оповещения сегодняшних бланков участка/цеха
+    (параметр after — последний полученный идентификатор).
+    POST — отметка о просмотре (JSON: {"ids": [...]}).
+    """
+
+    def get(self, request):
+        try:
+            after = int(request.GET.get('after', 0))
+        except ValueError:
+            after = 0
+
+        return JsonResponse({
+            'alerts': AlertService().get_pending(request.user, after),
+        })
+
+    def post(self, request):
+        try:
+            ids = [int(pk) for pk in json.loads(request.body)['ids']]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse(
+                {'success': False, 'error': 'Некорректные данные'}, status=400
+            )
+
+        acknowledged = AlertService().acknowledge(request.user, ids)
+
+        return JsonResponse({'success': True, 'acknowledged': acknowledged})
+
+
+def _parse_known(request) -> int:
+    """Количество записей словаря, уже известных клиенту"""
+    try:
+        return int(request.GET.get('known', 0))
+    except (TypeError, ValueError):
+        return 0
@@ -6,17 +6,41 @@ FR-016: Выбор причины отклонения
 FR-017: Подтверждение ввода данных
 """
 
+import json
+
 from django.contrib import messages
-from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, prefetch_related_objects
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views import View
 
 from shift_report.decorators import OperatorRequiredMixin
-from shift_report.models import (DeviationEntry, DeviationReason, PABlank,
-                                 PARecord)
+from shift_report.models import DeviationEntry, PABlank, PARecord
+from shift_report.services.reason_catalog import ReasonCatalog
+from shift_report.services.record_input import RecordInputService
+
+
+class BlankAccessMixin:
+    """Проверка доступа пользователя к бланку по его роли"""
+
+    def _can_access_blank(self, user, blank):
+        """Проверка доступа пользователя к бланку"""
+        if user.is_admin or user.is_superuser:
+            return True
+
+        if user.is_chief:
+            return blank.workplace.sector.workshop_id == user.workshop_id
+
+        if user.is_master:
+            return blank.workplace.sector_id == user.sector_id
+
+        if user.is_operator:
+            return blank.workplace_id == user.workplace_id
+
+        return False
 
 
 class OperatorDashboardView(OperatorRequiredMixin, View):
@@ -59,7 +83,7 @@ class OperatorDashboardView(OperatorRequiredMixin, View):
         })
 
 
-class BlankDetailView(OperatorRequiredMixin, View):
+class BlankDetailView(OperatorRequiredMixin, BlankAccessMixin, View):
     """
     Детальный просмотр бланка ПА.
 
@@ -108,22 +132,6 @@ class BlankDetailView(OperatorRequiredMixin, View):
             'current_hour': current_hour,
         })
 
-    def _can_access_blank(self, user, blank):
-        """Проверка доступа пользователя к бланку"""
-        if user.is_admin or user.is_superuser:
-            return True
-
-        if user.is_chief:
-            return blank.workplace.sector.workshop == user.workshop
-
-        if user.is_master:
-            return blank.workplace.sector == user.sector
-
-        if user.is_operator:
-            return blank.workplace == user.workplace
-
-        return False
-
 
 class RecordInputView(OperatorRequiredMixin, View):
     """
@@ -153,14 +161,9 @@ class RecordInputView(OperatorRequiredMixin, View):
             messages.warning(request, 'Бланк недоступен для редактирования')
             return redirect('operator:blank_detail', blank_id=blank.pk)
 
-        # Получаем топ-5 частых причин + все причины
-        top_reasons = DeviationReason.objects.filter(
-            is_active=True
-        ).order_by('-usage_count')[:5]
-
-        all_reasons = DeviationReason.objects.filter(
-            is_active=True
-        ).select_related('group').order_by('group__order', 'order', 'name')
+        # Получаем топ-5 частых причин + все причины (из кэша справочника)
+        top_reasons = ReasonCatalog.get_top(5)
+        all_reasons = ReasonCatalog.get_reasons()
 
         # Существующие отклонения для этой записи
         existing_deviations = record.deviations.select_related(
@@ -182,8 +185,14 @@ class RecordInputView(OperatorRequiredMixin, View):
         )
 
         blank = record.blank
+        is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
         if not blank.is_editable:
+            if is_ajax:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Бланк недоступен для редактирования'
+                })
             messages.warning(request, 'Бланк недоступен для редактирования')
             return redirect('operator:blank_detail', blank_id=blank.pk)
 
@@ -193,61 +202,101 @@ class RecordInputView(OperatorRequiredMixin, View):
             actual_quantity = 0
 
         # Сохраняем данные
-        with transaction.atomic():
-            record.actual_quantity = actual_quantity
-            record.is_filled = True
-            record.filled_at = timezone.now()
-            record.filled_by = request.user
+        try:
+            record, changed = RecordInputService().save_record(
+                record,
+                actual_quantity,
+                self._parse_deviations(request),
+                request.user,
+            )
+        except ValueError as e:
+            if is_ajax:
+                return JsonResponse({'success': False, 'error': str(e)})
+            messages.warning(request, str(e))
+            return redirect('operator:blank_detail', blank_id=blank.pk)
 
-            # Расчёт отклонения
-            record.deviation = record.actual_quantity - record.planned_quantity
+        message = f'Данные за {record.hour_number}-й час сохранены'
 
-            record.save()
+        if is_ajax:
+            return JsonResponse(self._row_patch(request, record, changed, message))
 
-            # Обработка причин отклонения (если есть отклонение)
-            if record.deviation < 0:
-                self._process_deviations(request, record)
+        messages.success(request, message)
 
-            # Пересчитываем накопительные показатели
-            record.calculate_cumulative()
+        return redirect('operator:blank_detail', blank_id=blank.pk)
 
-            # Пересчитываем итоги бланка
-            blank.recalculate_totals()
+    def _row_patch(self, request, record, changed, message):
+        """
+        Данные для обновления страницы бланка без перезагрузки.
 
-        messages.success(
-            request,
-            f'Данные за {record.hour_number}-й час сохранены'
-        )
+        Изменённая строка отдаётся целиком, у остальных строк, которые
+        вернул пересчёт (changed — RETURNING PARecord.recalculate_cumulative),
+        сдвинулись только накопительные показатели — для них отдаются
+        только эти ячейки. Записи бланка повторно не читаются.
+        """
+        blank = record.blank
 
-        return redirect('operator:blank_detail', blank_id=blank.pk)
+        prefetch_related_objects([record], Prefetch(
+            'deviations',
+            queryset=DeviationEntry.objects.select_related(
+                'reason', 'reason__group'
+            ),
+        ))
 
-    def _process_deviations(self, request, record):
-        """Обработка причин отклонения"""
-        # Удаляем старые отклонения
-        record.deviations.all().delete()
+        now = timezone.localtime().time()
+        current_hour = None
+        if record.start_time <= now <= record.end_time:
+            current_hour = record.hour_number
+
+        return {
+            'success': True,
+            'message': message,
+            'blank_id': blank.pk,
+            'rows': [
+                {
+                    'id': record.pk,
+                    'html': render_to_string(
+                        'shift_report/operator/_record_row.html',
+                        {'record': record, 'blank': blank, 'current_hour': current_hour},
+                        request,
+                    ),
+                },
+                *(
+                    {
+                        'id': row['id'],
+                        'cumulative_html': render_to_string(
+                            'shift_report/operator/_record_cumulative.html',
+                            {'record': row},
+                            request,
+                        ),
+                    }
+                    for row in changed
+                    if row['id'] != record.pk
+                ),
+            ],
+            'completion_html': render_to_string(
+                'shift_report/operator/_blank_completion.html',
+                {'blank': blank}, request,
+            ),
+            'summary_html': render_to_string(
+                'shift_report/operator/_blank_summary.html',
+                {'blank': blank}, request,
+            ),
+        }
 
+    def _parse_deviations(self, request):
+        """Разбор причин отклонения из формы"""
         reason_ids = request.POST.getlist('reason_ids', [])
         durations = request.POST.getlist('durations', [])
         comments = request.POST.getlist('comments', [])
 
-        for i, reason_id in enumerate(reason_ids):
-            if not reason_id:
-                continue
-
-            try:
-                reason = DeviationReason.objects.get(pk=reason_id, is_active=True)
-                duration = int(durations[i]) if i < len(durations) else 0
-                comment = comments[i] if i < len(comments) else ''
-
-                DeviationEntry.objects.create(
-                    record=record,
-                    reason=reason,
-                    duration_minutes=duration,
-                    comment=comment,
-                    created_by=request.user,
-                )
-            except (DeviationReason.DoesNotExist, ValueError, IndexError):
-                continue
+        return [
+            {
+                'reason_id': reason_id,
+                'duration': durations[i] if i < len(durations) else 0,
+                'comment': comments[i] if i < len(comments) else '',
+            }
+            for i, reason_id in enumerate(reason_ids)
+        ]
 
 
 class QuickInputView(OperatorRequiredMixin, View):
@@ -279,16 +328,12 @@ class QuickInputView(OperatorRequiredMixin, View):
                 'error': 'Некорректное значение'
             })
 
-        with transaction.atomic():
-            record.actual_quantity = actual_quantity
-            record.is_filled = True
-            record.filled_at = timezone.now()
-            record.filled_by = request.user
-            record.deviation = record.actual_quantity - record.planned_quantity
-            record.save()
-
-            record.calculate_cumulative()
-            blank.recalculate_totals()
+        try:
+            record, _ = RecordInputService().save_record(
+                record, actual_quantity, None, request.user
+            )
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
 
         return JsonResponse({
             'success': True,
@@ -300,6 +345,111 @@ class QuickInputView(OperatorRequiredMixin, View):
         })
 
 
+class RecordBatchInputView(OperatorRequiredMixin, BlankAccessMixin, View):
+    """
+    Пакетный ввод данных за несколько часов одного бланка (AJAX).
+
+    Принимает JSON вида:
+        {"entries": [{"record_id": 1, "actual_quantity": 20,
+                      "deviations": [{"reason_id": 3, "duration": 10,
+                                      "comment": ""}]}]}
+
+    Все часы сохраняются в одной транзакции с одним пересчётом
+    накопительных показателей и итогов бланка.
+    """
+
+    def post(self, request, blank_id):
+        blank = get_object_or_404(
+            PABlank.objects.select_related('workplace', 'workplace__sector'),
+            pk=blank_id
+        )
+
+        if not self._can_access_blank(request.user, blank):
+            return JsonResponse({
+                'success': False,
+                'error': 'У вас нет доступа к этому бланку'
+            }, status=403)
+
+        if not blank.is_editable:
+            return JsonResponse({
+                'success': False,
+                'error': 'Бланк недоступен для редактирования'
+            })
+
+        try:
+            entries = self._parse_entries(request)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        try:
+            RecordInputService().save_batch(blank, entries, request.user)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        records_data = list(blank.records.order_by('hour_number').values(
+            'id',
+            'hour_number',
+            'planned_quantity',
+            'actual_quantity',
+            'deviation',
+            'is_filled',
+            'cumulative_plan',
+            'cumulative_fact',
+            'cumulative_deviation',
+        ))
+
+        return JsonResponse({
+            'success': True,
+            'blank': {
+                'id': blank.pk,
+                'total_plan': blank.total_plan,
+                'total_fact': blank.total_fact,
+                'total_deviation': blank.total_deviation,
+                'completion': float(blank.completion_percentage),
+            },
+            'records': records_data,
+        })
+
+    def _parse_entries(self, request):
+        """
+        Разбор и валидация тела запроса.
+
+        Raises:
+            ValueError: С указанием номера некорректной записи пакета
+        """
+        try:
+            items = list(json.loads(request.body)['entries'])
+        except (ValueError, TypeError, KeyError):
+            raise ValueError('Некорректные данные') from None
+
+        entries = []
+        for number, entry in enumerate(items, start=1):
+            try:
+                record_id = int(entry['record_id'])
+                actual_quantity = int(entry['actual_quantity'])
+            except (ValueError, TypeError, KeyError):
+                raise ValueError(f'Запись №{number}: некорректные данные') from None
+
+            if actual_quantity < 0:
+                raise ValueError(f'Запись №{number}: отрицательное количество')
+
+            try:
+                deviations = _parse_deviation_items(entry.get('deviations'))
+            except ValueError as e:
+                raise ValueError(f'Запись №{number}: {e}') from None
+
+            entries.append({
+                'record_id': record_id,
+                'actual_quantity': actual_quantity,
+                'deviations': deviations,
+            })
+
+        if not entries:
+            raise ValueError('Пустой пакет')
+
+        return entries
+
+
 class ReasonSearchView(OperatorRequiredMixin, View):
     """
     Поиск причин отклонения.
@@ -310,28 +460,177 @@ class ReasonSearchView(OperatorRequiredMixin, View):
     def get(self, request):
         query = request.GET.get('q', '').strip()
 
-        reasons = DeviationReason.objects.filter(
-            is_active=True
-        ).select_related('group')
+        data = [
+            {
+                'id': r['id'],
+                'name': r['name'],
+                'code': r['code'],
+                'group': r['group'],
+                'group_color': r['group_color'],
+            }
+            for r in ReasonCatalog.search(query, limit=20)
+        ]
+
+        return JsonResponse({'reasons': data})
 
-        if query:
-            reasons = reasons.filter(
-                Q(name__icontains=query) |
-                Q(code__icontains=query) |
-                Q(group__name__icontains=query)
-            )
 
-        reasons = reasons.order_by('-usage_count', 'name')[:20]
+class ReasonCatalogView(OperatorRequiredMixin, View):
+    """
+    Полный справочник активных причин отклонения.
+
+    Кэшируется service worker'ом планшета для выбора причин без сети.
+    """
 
+    def get(self, request):
         data = [
             {
-                'id': r.pk,
-                'name': r.name,
-                'code': r.code,
-                'group': r.group.name,
-                'group_color': r.group.color,
+                'id': r['id'],
+                'name': r['name'],
+                'code': r['code'],
+                'group': r['group'],
+                'group_color': r['group_color'],
+                'usage_count': r['usage_count'],
             }
-            for r in reasons
+            for r in ReasonCatalog.get_reasons()
         ]
 
         return JsonResponse({'reasons': data})
+
+
+class SyncQueueView(OperatorRequiredMixin, BlankAccessMixin, View):
+    """
+    Приём офлайн-очереди операций с планшета (AJAX).
+
+    Принимает JSON вида:
+        {"operations": [{"key": "uuid", "record_id": 1,
+                         "actual_quantity": 20, "deviations": [],
+                         "created_at": "2026-01-01T10:00:00+03:00"}]}
+
+    Повторная отправка операции с тем же ключом ничего не меняет.
+    Операция с некорректными данными отклоняется (rejected) отдельно,
+    не мешая остальным операциям очереди.
+    """
+
+    def post(self, request):
+        try:
+            operations, invalid = self._parse_operations(request)
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({
+                'success': False,
+                'error': 'Некорректные данные'
+            }, status=400)
+
+        results = RecordInputService().apply_sync_operations(
+            operations,
+            request.user,
+            can_access=lambda blank: self._can_access_blank(request.user, blank),
+        )
+        for key in invalid:
+            results.setdefault(key, 'rejected')
+
+        return JsonResponse({'success': True, 'results': results})
+
+    def _parse_operations(self, request):
+        """
+        Разбор и валидация тела запроса.
+
+        Returns:
+            tuple: (корректные операции, ключи некорректных операций)
+
+        Raises:
+            ValueError: Если тело не разбирается или у операции нет ключа
+        """
+        payload = json.loads(request.body)
+        operations = []
+        invalid = []
+
+        for op in payload['operations']:
+            key = str(op['key'])
+            if not key or len(key) > 64:
+                raise ValueError('Некорректная операция')
+
+            try:
+                operations.append(self._parse_operation(key, op))
+            except (ValueError, TypeError, KeyError):
+                invalid.append(key)
+
+        return operations, invalid
+
+    def _parse_operation(self, key, op) -> dict:
+        """Разбор одной операции очереди"""
+        actual_quantity = int(op['actual_quantity'])
+        if actual_quantity < 0:
+            raise ValueError('Отрицательное количество')
+
+        created_at = op.get('created_at') or None
+        if created_at is not None:
+            if not isinstance(created_at, str):
+                raise TypeError('Время операции должно быть строкой')
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError('Некорректное время операции')
+
+        return {
+            'key': key,
+            'record_id': int(op['record_id']),
+            'actual_quantity': actual_quantity,
+            'deviations': _parse_deviation_items(op.get('deviations')),
+            'created_at': created_at,
+        }
+
+
+class ServiceWorkerView(OperatorRequiredMixin, View):
+    """
+    Service worker интерфейса оператора.
+
+    Отдаётся из /operator/, чтобы его область действия покрывала
+    страницы бланков и ввода данных.
+    """
+
+    template_name = 'shift_report/operator/sw.js'
+
+    def get(self, request):
+        response = render(
+            request,
+            self.template_name,
+            content_type='application/javascript',
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+def _parse_deviation_items(value) -> list[dict]:
+    """
+    Причины отклонения из JSON-тела запроса (список объектов).
+
+    reason_id — целое больше нуля, duration — целое число минут
+    от 0 до DeviationEntry.MAX_DURATION_MINUTES (числом или строкой из поля ввода).
+
+    Raises:
+        ValueError: С указанием номера некорректной причины
+    """
+    items = []
+    for number, item in enumerate(list(value or []), start=1):
+        try:
+            reason_id = _parse_int(item['reason_id'])
+            duration = _parse_int(item.get('duration') or 0)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise ValueError(f'некорректная причина отклонения №{number}') from None
+
+        if reason_id <= 0 or not 0 <= duration <= DeviationEntry.MAX_DURATION_MINUTES:
+            raise ValueError(f'некорректная причина отклонения №{number}')
+
+        items.append({
+            'reason_id': reason_id,
+            'duration': duration,
+            'comment': str(item.get('comment') or ''),
+        })
+
+    return items
+
+
+def _parse_int(value) -> int:
+    """Целое из JSON: число или строка цифр (не bool и не дробное)"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError('Ожидается целое число')
+    return int(value)